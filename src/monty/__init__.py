@@ -7,16 +7,25 @@ useful design patterns such as singleton and cached_class, and many more.
 
 from __future__ import annotations
 
-from importlib.metadata import PackageNotFoundError, version
-
 __author__ = "Shyue Ping Ong"
 __copyright__ = "Copyright 2014, The Materials Virtual Lab"
 __maintainer__ = "Shyue Ping Ong"
 __email__ = "ongsp@ucsd.edu"
 __date__ = "Oct 12 2020"
 
-try:
-    __version__ = version("monty")
-except PackageNotFoundError:  # pragma: no cover
-    # package is not installed
-    pass
+
+def __getattr__(name: str) -> str:
+    # importlib.metadata is slow to import, so only look up the version
+    # when it is requested
+    if name == "__version__":
+        from importlib.metadata import PackageNotFoundError, version
+
+        try:
+            __version__ = version("monty")
+        except PackageNotFoundError:  # pragma: no cover
+            # package is not installed
+            pass
+        else:
+            globals()["__version__"] = __version__
+            return __version__
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
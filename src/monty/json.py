@@ -4,42 +4,63 @@ JSON serialization and deserialization utilities.
 
 from __future__ import annotations
 
+import base64
 import dataclasses
 import datetime
+import functools
 import json
 import os
 import pathlib
 import pickle
+import struct
+import sys
 import traceback
 import types
-from collections import OrderedDict, defaultdict
+import weakref
+import zlib
+from collections import OrderedDict, defaultdict, namedtuple
+from collections.abc import MutableMapping, MutableSequence
+from contextlib import contextmanager
+from contextvars import ContextVar
 from enum import Enum
-from hashlib import sha1
+from hashlib import blake2b, sha1
 from importlib import import_module
 from inspect import getfullargspec, isclass
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
 from typing import TYPE_CHECKING
 from uuid import UUID, uuid4
 
-import numpy as np
-from ruamel.yaml import YAML
-
 if TYPE_CHECKING:
-    from typing import Any
+    from typing import IO, Any, Callable, Iterator, Literal
+
+    import numpy as np
 
-try:
-    import bson
-    from bson import json_util
-except ImportError:
-    bson = None
-    json_util = None
+# numpy, bson, orjson and ruamel.yaml are imported when first needed, which
+# makes importing this module several times faster. Objects from a module
+# that has not been imported yet cannot be encountered while encoding.
 
 __version__ = "3.0.0"
 
+# Sentinel returned when a tagged dict cannot be decoded into an object
+_UNDECODED = object()
+
+_CacheInfo = namedtuple("_CacheInfo", ["hits", "misses", "currsize"])
+
+# Process-wide cache of resolved classes, keyed on (module, class) after
+# redirects have been applied. A value of None records a module that has no
+# such attribute.
+_CLASS_CACHE: dict[tuple[str, str], Any] = {}
+_class_cache_hits = 0
+_class_cache_misses = 0
+
 
 def _load_redirect(redirect_file) -> dict:
     try:
         with open(redirect_file, encoding="utf-8") as f:
+            from ruamel.yaml import YAML
+
             yaml = YAML()
             d = yaml.load(f)
     except OSError:
@@ -64,6 +85,435 @@ def _load_redirect(redirect_file) -> dict:
     return dict(redirect_dict)
 
 
+class _LazyRedirect:
+    """
+    Class attribute loading the redirects in ~/.monty.yaml when first
+    accessed, rather than when this module is imported. The loaded dict then
+    replaces this descriptor on the class, which may also be assigned
+    another dict directly.
+    """
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._owner = owner
+        self._name = name
+
+    def __get__(self, obj, objtype=None) -> dict:
+        redirect = _load_redirect(os.path.join(os.path.expanduser("~"), ".monty.yaml"))
+        setattr(self._owner, self._name, redirect)
+        return redirect
+
+
+def _resolve_class(modname: str, classname: str) -> Any:
+    """Import and return modname.classname, caching the result process-wide.
+
+    Returns None if the module can be imported but has no attribute named
+    classname. ImportErrors are propagated and not cached.
+    """
+    global _class_cache_hits, _class_cache_misses
+
+    key = (modname, classname)
+    try:
+        cls_ = _CLASS_CACHE[key]
+    except KeyError:
+        _class_cache_misses += 1
+        mod = __import__(modname, globals(), locals(), [classname], 0)
+        cls_ = getattr(mod, classname, None)
+        _CLASS_CACHE[key] = cls_
+        return cls_
+    _class_cache_hits += 1
+    return cls_
+
+
+def clear_class_cache() -> None:
+    """Clear the process-wide cache of classes resolved by MontyDecoder.
+
+    This should be called if modules are reloaded or classes are replaced
+    at runtime, so that subsequent decoding picks up the new definitions.
+    """
+    global _class_cache_hits, _class_cache_misses
+
+    _CLASS_CACHE.clear()
+    _class_cache_hits = 0
+    _class_cache_misses = 0
+
+
+def class_cache_info() -> tuple[int, int, int]:
+    """Report statistics of the class resolution cache used by MontyDecoder.
+
+    Returns:
+        namedtuple: (hits, misses, currsize), analogous to
+            functools.lru_cache's cache_info.
+    """
+    return _CacheInfo(_class_cache_hits, _class_cache_misses, len(_CLASS_CACHE))
+
+
+@functools.lru_cache(maxsize=None)
+def _import_optional(name: str) -> types.ModuleType | None:
+    """Import an optional dependency once, returning None if not installed."""
+    try:
+        return import_module(name)
+    except ImportError:
+        return None
+
+
+# Optional modules that used to be imported by this module, for backwards
+# compatibility. They are now imported on first use.
+_LAZY_MODULES = {
+    "np": "numpy",
+    "bson": "bson",
+    "json_util": "bson.json_util",
+    "orjson": "orjson",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_MODULES:
+        return _import_optional(_LAZY_MODULES[name])
+    if name == "YAML":
+        from ruamel.yaml import YAML
+
+        return YAML
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Registry used to decode pint Quantities, see set_unit_registry
+_UNIT_REGISTRY: Any = None
+
+
+def set_unit_registry(registry) -> None:
+    """
+    Set the pint UnitRegistry used by MontyDecoder to decode Quantities.
+
+    Args:
+        registry (pint.UnitRegistry | None): Registry of the decoded
+            Quantities. If None, pint's application registry is used, which
+            is also the registry of pint.Quantity.
+    """
+    global _UNIT_REGISTRY
+
+    _UNIT_REGISTRY = registry
+
+
+def _get_unit_registry():
+    if _UNIT_REGISTRY is None:
+        return _import_optional("pint").get_application_registry().get()
+    return _UNIT_REGISTRY
+
+
+@functools.lru_cache(maxsize=256)
+def _get_units(registry, units: str):
+    # Parsing units is by far the most expensive part of building Quantities
+    return registry.Unit(units)
+
+
+@dataclasses.dataclass
+class _SerializationPlan:
+    """Introspection results reused by MSONable.as_dict for a given class."""
+
+    args: tuple[str, ...]
+    varargs: str | None
+    version: str | None
+
+
+_SERIALIZATION_PLANS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _get_serialization_plan(cls) -> _SerializationPlan:
+    """Get the serialization plan of an MSONable class, computing it if needed.
+
+    Plans are cached per class unless the class sets
+    CACHE_SERIALIZATION_PLAN to False.
+    """
+    try:
+        return _SERIALIZATION_PLANS[cls]
+    except KeyError:
+        pass
+
+    try:
+        parent_module = cls.__module__.split(".", maxsplit=1)[0]
+        version = str(import_module(parent_module).__version__)
+    except (AttributeError, ImportError):
+        version = None
+
+    spec = getfullargspec(cls.__init__)
+    plan = _SerializationPlan(
+        args=tuple(c for c in spec.args + spec.kwonlyargs if c != "self"),
+        varargs=spec.varargs,
+        version=version,
+    )
+    if getattr(cls, "CACHE_SERIALIZATION_PLAN", True):
+        _SERIALIZATION_PLANS[cls] = plan
+    return plan
+
+
+# When set, MSONable.as_dict leaves nested MSONables and dataclasses to an
+# encoder instead of converting them to dicts, passing them to this function,
+# whose result is put in their place.
+_DEFER_NESTED_AS_DICT: ContextVar[Callable | None] = ContextVar(
+    "_DEFER_NESTED_AS_DICT", default=None
+)
+
+
+@contextmanager
+def _deferred_as_dict(wrap: Callable | None = None):
+    token = _DEFER_NESTED_AS_DICT.set(wrap or _unchanged)
+    try:
+        yield
+    finally:
+        _DEFER_NESTED_AS_DICT.reset(token)
+
+
+def _unchanged(obj):
+    return obj
+
+
+def _defers_nested(obj) -> bool:
+    # Whether obj uses the default MSONable.as_dict, which can leave nested
+    # objects to an encoder. Overrides of as_dict may post-process the dicts
+    # of nested objects, so these are always converted for them.
+    return getattr(type(obj), "as_dict", None) is MSONable.as_dict
+
+
+class _Deferred:
+    """
+    Nested object left to MontyEncoder(dedup=True) by as_dict. Each
+    occurrence is wrapped in a new instance, so that the check for circular
+    references of the json encoder does not prevent writing references to
+    the objects being encoded, but still applies to plain lists and dicts.
+    """
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj) -> None:
+        self.obj = obj
+
+
+# While writing json with orjson, the encoder of the Enums and UUIDs found by
+# as_dict, which orjson would otherwise write as plain values.
+_ENCODE_ORJSON_NATIVE: ContextVar[Callable | None] = ContextVar(
+    "_ENCODE_ORJSON_NATIVE", default=None
+)
+
+
+def _recursive_as_dict(obj):
+    if type(obj) in _JSON_SCALAR_TYPES:
+        return obj
+    if isinstance(obj, (list, tuple)):
+        return [_recursive_as_dict(it) for it in obj]
+    if isinstance(obj, dict):
+        return {kk: _recursive_as_dict(vv) for kk, vv in obj.items()}
+    if hasattr(obj, "as_dict"):
+        defer = _DEFER_NESTED_AS_DICT.get()
+        if defer is not None:
+            return defer(obj)
+        return obj.as_dict()
+    if dataclasses is not None and dataclasses.is_dataclass(obj):
+        defer = _DEFER_NESTED_AS_DICT.get()
+        if defer is not None:
+            return defer(obj)
+        return {k: _recursive_as_dict(v) for k, v in _dataclass_as_dict(obj).items()}
+    if isinstance(obj, (Enum, UUID)):
+        encode = _ENCODE_ORJSON_NATIVE.get()
+        if encode is not None and _is_orjson_native(obj):
+            return encode(obj)
+    return obj
+
+
+# Names of the fields of the dataclasses encoded so far
+_DATACLASS_FIELDS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _dataclass_as_dict(obj) -> dict:
+    """
+    Shallow dict of the fields of a dataclass instance, with its @module
+    and @class. Unlike dataclasses.asdict, the values are neither copied nor
+    converted, so that large fields such as arrays are not copied and nested
+    dataclasses and MSONables are encoded with their own tags.
+    """
+    cls = type(obj)
+    try:
+        names = _DATACLASS_FIELDS[cls]
+    except KeyError:
+        names = _DATACLASS_FIELDS[cls] = tuple(f.name for f in dataclasses.fields(cls))
+    d = {name: getattr(obj, name) for name in names}
+    d["@module"] = cls.__module__
+    d["@class"] = cls.__name__
+    return d
+
+
+# Encodings of the raw buffer of numpy arrays supported by MontyEncoder.
+_ARRAY_BUFFER_ENCODINGS = ("base64", "base64-zlib")
+
+
+def _encode_array_buffer(arr: np.ndarray, encoding: str) -> dict[str, Any]:
+    """Encode the raw buffer of a numpy array as base64 text.
+
+    Args:
+        arr: Array with a numeric, bool or datetime dtype.
+        encoding: "base64", or "base64-zlib" to compress the buffer first.
+
+    Returns:
+        dict with the dtype, byte order, shape and encoded buffer.
+    """
+    data = arr.tobytes()
+    if encoding == "base64-zlib":
+        data = zlib.compress(data)
+    byteorder = arr.dtype.byteorder
+    if byteorder == "=":
+        byteorder = "<" if sys.byteorder == "little" else ">"
+    return {
+        "dtype": str(arr.dtype),
+        "byteorder": byteorder,
+        "shape": list(arr.shape),
+        "encoding": encoding,
+        "data": base64.b64encode(data).decode("ascii"),
+    }
+
+
+def _decode_array_buffer(d: dict[str, Any]) -> np.ndarray:
+    """Rebuild a numpy array from the output of _encode_array_buffer."""
+    data = base64.b64decode(d["data"])
+    if d["encoding"] == "base64-zlib":
+        data = zlib.decompress(data)
+    import numpy as np
+
+    dtype = np.dtype(d["dtype"]).newbyteorder(d["byteorder"])
+    # Use a bytearray so that the returned array is writable
+    return np.frombuffer(bytearray(data), dtype=dtype).reshape(d["shape"])
+
+
+def _round_float(x: float, precision: int) -> float:
+    """Round x to the given number of significant digits."""
+    return float(f"{x:.{precision}g}")
+
+
+def _round_floats(obj, precision: int):
+    """Round the floats in the lists and dicts of a json-like object."""
+    if isinstance(obj, float):
+        return _round_float(obj, precision)
+    if isinstance(obj, dict):
+        return {k: _round_floats(v, precision) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_round_floats(v, precision) for v in obj]
+    return obj
+
+
+def _downcast_float_array(arr: np.ndarray) -> np.ndarray:
+    """Convert an array of floats wider than float32 to float32."""
+    import numpy as np
+
+    if arr.dtype.kind == "f" and arr.dtype.itemsize > 4:
+        return arr.astype(np.float32)
+    if arr.dtype.kind == "c" and arr.dtype.itemsize > 8:
+        return arr.astype(np.complex64)
+    return arr
+
+
+def _tolist(arr: np.ndarray) -> list:
+    return arr.tolist()
+
+
+def _float32_list(arr: np.ndarray) -> list:
+    """
+    Convert an array to nested lists, with the elements of float32 arrays
+    converted to the Python floats with the shortest repr that round-trips
+    to the same float32, e.g. 0.1 rather than 0.10000000149011612.
+    """
+    import numpy as np
+
+    if arr.dtype != np.float32:
+        return arr.tolist()
+    return arr.astype(str).astype(np.float64).tolist()
+
+
+# Encodings of monotonic integer arrays as varints of zigzagged differences
+_DELTA_ENCODINGS = ("delta-varint", "delta-varint-zlib")
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+def _encode_delta_varint(arr: np.ndarray, encoding: str) -> dict[str, Any] | None:
+    """
+    Encode a monotonic integer array as the differences between consecutive
+    elements, zigzagged so that decreasing arrays give small unsigned
+    numbers, and written as LEB128 varints, which usually take one or two
+    bytes each.
+
+    Args:
+        arr: Array with an integer dtype.
+        encoding: "delta-varint", or "delta-varint-zlib" to compress the
+            varints.
+
+    Returns:
+        dict with the dtype, shape and encoded varints, or None if the array
+        is not monotonic or has values outside the range of int64.
+    """
+    import numpy as np
+
+    flat = arr.reshape(-1)
+    if flat.size < 2:
+        return None
+    if not (np.all(flat[1:] >= flat[:-1]) or np.all(flat[1:] <= flat[:-1])):
+        return None
+    low, high = int(flat.min()), int(flat.max())
+    # Differences must fit in an int64 too
+    if low < _INT64_MIN or high > _INT64_MAX or high - low > _INT64_MAX:
+        return None
+
+    values = flat.astype(np.int64)
+    deltas = np.empty_like(values)
+    deltas[0] = values[0]
+    np.subtract(values[1:], values[:-1], out=deltas[1:])
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).view(np.uint64)
+
+    # Split each number into groups of 7 bits, keeping the significant
+    # groups and flagging all but the last one with the high bit.
+    shifted = zigzag[:, None] >> np.arange(0, 64, 7, dtype=np.uint64)
+    n_groups = 1 + np.count_nonzero(shifted[:, 1:], axis=1)
+    position = np.arange(shifted.shape[1])
+    groups = (shifted & 0x7F).astype(np.uint8)
+    groups[position < n_groups[:, None] - 1] |= 0x80
+    data = groups[position < n_groups[:, None]].tobytes()
+
+    if encoding == "delta-varint-zlib":
+        data = zlib.compress(data)
+    return {
+        "dtype": str(arr.dtype),
+        "shape": list(arr.shape),
+        "encoding": encoding,
+        "data": base64.b64encode(data).decode("ascii"),
+    }
+
+
+def _decode_delta_varint(d: dict[str, Any]) -> np.ndarray:
+    """Rebuild a numpy array from the output of _encode_delta_varint."""
+    import numpy as np
+
+    data = base64.b64decode(d["data"])
+    if d["encoding"] == "delta-varint-zlib":
+        data = zlib.decompress(data)
+    groups = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(groups < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    # Position of each group within its number
+    position = np.arange(len(groups)) - np.repeat(starts, ends - starts + 1)
+    bits = (groups & 0x7F).astype(np.uint64) << (7 * position).astype(np.uint64)
+    zigzag = np.bitwise_or.reduceat(bits, starts)
+    magnitude = (zigzag >> np.uint64(1)).view(np.int64)
+    sign = -(zigzag & np.uint64(1)).view(np.int64)
+    deltas = magnitude ^ sign
+    return np.cumsum(deltas).astype(d["dtype"]).reshape(d["shape"])
+
+
+def _copy_prefix(container: dict | list, n: int) -> list:
+    """Return the first n values of a dict or list as a new list."""
+    if isinstance(container, dict):
+        return list(islice(container.values(), n))
+    return container[:n]
+
+
 def _check_type(obj: object, type_str: tuple[str, ...] | str) -> bool:
     """Alternative to isinstance that avoids imports.
 
@@ -95,11 +545,168 @@ def _check_type(obj: object, type_str: tuple[str, ...] | str) -> bool:
     if isclass(obj):
         return False
 
-    type_str = type_str if isinstance(type_str, tuple) else (type_str,)
+    names = _get_mro_names(type(obj))
+    if isinstance(type_str, str):
+        return type_str in names
+    return any(ts in names for ts in type_str)
+
+
+# Fully qualified names of all classes in the MRO of a type, cached per type
+_MRO_NAMES: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _get_mro_names(cls: type) -> frozenset[str]:
+    try:
+        return _MRO_NAMES[cls]
+    except KeyError:
+        names = frozenset(f"{o.__module__}.{o.__qualname__}" for o in cls.mro())
+        _MRO_NAMES[cls] = names
+        return names
+
+
+# Hashers of MSONables memoized by canonical_hash, keyed on their id along
+# with a weak reference that tells whether the object is still the same.
+_CANONICAL_HASHES: dict[int, tuple[weakref.ref, Any]] = {}
+
+
+class _HashNodeEnd:
+    """
+    Marks the end of the values of a tagged dict on the hashing stack, along
+    with the object it was converted from, if any.
+    """
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj) -> None:
+        self.obj = obj
 
-    mro = type(obj).mro()
 
-    return any(f"{o.__module__}.{o.__qualname__}" == ts for o in mro for ts in type_str)
+def _get_memoized_hash(obj):
+    entry = _CANONICAL_HASHES.get(id(obj))
+    if entry is not None and entry[0]() is obj:
+        return entry[1]
+    return None
+
+
+def _memoize_hash(obj, hasher) -> None:
+    key = id(obj)
+    try:
+        ref = weakref.ref(obj, lambda _: _CANONICAL_HASHES.pop(key, None))
+    except TypeError:
+        # Objects that do not support weak references are not memoized
+        return
+    _CANONICAL_HASHES[key] = (ref, hasher)
+
+
+def _canonical_hash(obj, memoize: bool = False):
+    """
+    Hash an MSONable with blake2b in a single pass over its as_dict
+    representation. Each value is fed with a type tag and, for strings,
+    bytes and containers, a length prefix so that the input is unambiguous.
+    Dict keys are sorted, "@version" keys are skipped, the elements of sets
+    are fed in the order of their hashes and the buffers of numeric numpy
+    arrays are hashed as they are. Each tagged dict, i.e. with "@module" and
+    "@class", is hashed separately and only its digest is fed to its parent.
+    The nested MSONables left as they are by the default as_dict are hashed
+    the same way, which allows memoizing the hashes of shared sub-objects.
+    """
+    encoder = MontyEncoder()
+    np = sys.modules.get("numpy")
+    hashers = [blake2b()]
+    in_progress: set[int] = set()
+    stack: list = [obj]
+
+    def push_items(h, d: dict) -> None:
+        items = sorted(
+            ((str(k), v) for k, v in d.items() if k != "@version"),
+            key=itemgetter(0),
+        )
+        h.update(b"{%d;" % len(items))
+        for k, v in reversed(items):
+            stack.append(v)
+            stack.append(k)
+
+    while stack:
+        o = stack.pop()
+        h = hashers[-1]
+        t = type(o)
+        if t is str:
+            b = o.encode("utf-8")
+            h.update(b"s%d:" % len(b))
+            h.update(b)
+        elif o is None:
+            h.update(b"n")
+        elif t is bool:
+            h.update(b"T" if o else b"F")
+        elif t is int:
+            h.update(b"i%d;" % o)
+        elif t is float:
+            h.update(b"f")
+            h.update(struct.pack("<d", o))
+        elif t is complex:
+            h.update(b"c")
+            h.update(struct.pack("<dd", o.real, o.imag))
+        elif isinstance(o, (bytes, bytearray)):
+            h.update(b"b%d:" % len(o))
+            h.update(o)
+        elif isinstance(o, dict):
+            if "@module" in o and "@class" in o:
+                hashers.append(blake2b())
+                stack.append(_HashNodeEnd(None))
+            push_items(hashers[-1], o)
+        elif isinstance(o, (list, tuple)):
+            h.update(b"[%d;" % len(o))
+            stack.extend(reversed(o))
+        elif isinstance(o, (set, frozenset)):
+            h.update(b"S%d;" % len(o))
+            for digest in sorted(_canonical_hash(v, memoize).digest() for v in o):
+                h.update(digest)
+        elif isinstance(o, _HashNodeEnd):
+            node = hashers.pop()
+            if o.obj is not None:
+                in_progress.discard(id(o.obj))
+                if memoize:
+                    _memoize_hash(o.obj, node)
+            if not stack:
+                return node.copy() if memoize else node
+            hashers[-1].update(b"m")
+            hashers[-1].update(node.digest())
+        elif np is not None and isinstance(o, np.ndarray):
+            if o.dtype.kind == "O":
+                h.update(b"O%s;" % repr(o.shape).encode())
+                stack.append(o.tolist())
+                continue
+            a = np.ascontiguousarray(o)
+            if not a.dtype.isnative:
+                a = a.astype(a.dtype.newbyteorder("="))
+            h.update(b"a%s;%s;" % (a.dtype.str.encode(), repr(a.shape).encode()))
+            h.update(a.reshape(-1).view(np.uint8))
+        elif np is not None and isinstance(o, np.generic):
+            stack.append(o.item())
+        elif hasattr(o, "as_dict"):
+            memoized = _get_memoized_hash(o) if memoize else None
+            if memoized is not None:
+                if not stack:
+                    return memoized.copy()
+                h.update(b"m")
+                h.update(memoized.digest())
+                continue
+            if id(o) in in_progress:
+                raise ValueError("Circular reference detected")
+            # Nested objects are only left as they are by the default as_dict,
+            # overrides are given the real as_dict of nested objects.
+            if _defers_nested(o):
+                with _deferred_as_dict():
+                    d = encoder.default(o)
+            else:
+                d = encoder.default(o)
+            in_progress.add(id(o))
+            hashers.append(blake2b())
+            stack.append(_HashNodeEnd(o))
+            push_items(hashers[-1], d)
+        else:
+            stack.append(encoder.default(o))
+    return hashers[0]
 
 
 class MSONable:
@@ -141,68 +748,49 @@ class MSONable:
 
     Example:
     old_module.old_class: new_module.new_class
+
+    The introspection performed by the default as_dict (constructor
+    signature, attribute names and module version) is computed once per
+    class and reused. Classes whose signature or attributes change
+    dynamically can opt out by setting CACHE_SERIALIZATION_PLAN = False.
     """
 
-    REDIRECT = _load_redirect(os.path.join(os.path.expanduser("~"), ".monty.yaml"))
+    CACHE_SERIALIZATION_PLAN = True
+
+    REDIRECT = _LazyRedirect()
 
     def as_dict(self) -> dict:
         """
         A JSON serializable dict representation of an object.
         """
+        plan = _get_serialization_plan(self.__class__)
         d: dict[str, Any] = {
             "@module": self.__class__.__module__,
             "@class": self.__class__.__name__,
+            "@version": plan.version,
         }
 
-        try:
-            parent_module = self.__class__.__module__.split(".", maxsplit=1)[0]
-            module_version = import_module(parent_module).__version__
-            d["@version"] = str(module_version)
-        except (AttributeError, ImportError):
-            d["@version"] = None
-
-        spec = getfullargspec(self.__class__.__init__)
-
-        def recursive_as_dict(obj):
-            if isinstance(obj, (list, tuple)):
-                return [recursive_as_dict(it) for it in obj]
-            if isinstance(obj, dict):
-                return {kk: recursive_as_dict(vv) for kk, vv in obj.items()}
-            if hasattr(obj, "as_dict"):
-                return obj.as_dict()
-            if dataclasses is not None and dataclasses.is_dataclass(obj):
-                d = dataclasses.asdict(obj)
-                d.update(
-                    {
-                        "@module": obj.__class__.__module__,
-                        "@class": obj.__class__.__name__,
-                    }
-                )
-                return d
-            return obj
-
-        for c in spec.args + spec.kwonlyargs:
-            if c != "self":
+        for c in plan.args:
+            try:
+                a = getattr(self, c)
+            except AttributeError:
                 try:
-                    a = getattr(self, c)
+                    a = getattr(self, "_" + c)
                 except AttributeError:
-                    try:
-                        a = getattr(self, "_" + c)
-                    except AttributeError:
-                        raise NotImplementedError(
-                            "Unable to automatically determine as_dict "
-                            "format from class. MSONAble requires all "
-                            "args to be present as either self.argname or "
-                            "self._argname, and kwargs to be present under "
-                            "a self.kwargs variable to automatically "
-                            "determine the dict format. Alternatively, "
-                            "you can implement both as_dict and from_dict."
-                        )
-                d[c] = recursive_as_dict(a)
+                    raise NotImplementedError(
+                        "Unable to automatically determine as_dict "
+                        "format from class. MSONAble requires all "
+                        "args to be present as either self.argname or "
+                        "self._argname, and kwargs to be present under "
+                        "a self.kwargs variable to automatically "
+                        "determine the dict format. Alternatively, "
+                        "you can implement both as_dict and from_dict."
+                    )
+            d[c] = _recursive_as_dict(a)
         if hasattr(self, "kwargs"):
             d.update(**self.kwargs)
-        if spec.varargs is not None and getattr(self, spec.varargs, None) is not None:
-            d.update({spec.varargs: getattr(self, spec.varargs)})
+        if plan.varargs is not None and getattr(self, plan.varargs, None) is not None:
+            d.update({plan.varargs: getattr(self, plan.varargs)})
         if hasattr(self, "_kwargs"):
             d.update(**self._kwargs)
         if isinstance(self, Enum):
@@ -219,17 +807,23 @@ class MSONable:
         Returns:
             MSONable class.
         """
-        decoded = {
-            k: MontyDecoder().process_decoded(v)
-            for k, v in d.items()
-            if not k.startswith("@")
-        }
+        decoded = MontyDecoder().process_decoded(
+            {k: v for k, v in d.items() if not k.startswith("@")}
+        )
         return cls(**decoded)
 
-    def to_json(self) -> str:
+    def to_json(self, engine: Literal["json", "orjson"] = "json") -> str:
         """
         Returns a json string representation of the MSONable object.
+
+        Args:
+            engine ("json" | "orjson"): Library used to write the json. See
+                orjson_dumps for the differences of the "orjson" engine.
         """
+        if engine == "orjson":
+            return orjson_dumps(self).decode("utf-8")
+        if engine != "json":
+            raise ValueError(f"Invalid engine: {engine}")
         return json.dumps(self, cls=MontyEncoder)
 
     def unsafe_hash(self):
@@ -267,6 +861,24 @@ class MSONable:
         ordered_keys = [item for item in ordered_keys if "@" not in item[0]]
         return sha1(json.dumps(OrderedDict(ordered_keys)).encode("utf-8"))
 
+    def canonical_hash(self, memoize: bool = False):
+        """
+        Returns a blake2b hash of the object, computed in a single streaming
+        pass over its as_dict representation. Objects with equal as_dict
+        representations have the same hash, whatever the order of their
+        keys and the version of their package.
+
+        Args:
+            memoize (bool): If True, remember the hash of this object and of
+                the MSONables it contains, and reuse the hashes remembered
+                before. Only use this for objects that are not modified after
+                being hashed.
+
+        Returns:
+            A hashlib blake2b object.
+        """
+        return _canonical_hash(self, memoize=memoize)
+
     @classmethod
     def _validate_monty(cls, __input_value):
         """
@@ -356,6 +968,7 @@ class MSONable:
         json_kwargs=None,
         pickle_kwargs=None,
         strict=True,
+        array_threshold=None,
     ):
         """Utility that uses the standard tools of MSONable to convert the
         class to json format, but also save it to disk. In addition, this
@@ -368,7 +981,8 @@ class MSONable:
         the location {save_dir}/class.json. For a partially MSONable class,
         additional information will be saved to the save directory at
         {save_dir}. This includes a pickled object for each attribute that
-        e serialized.
+        e serialized. If array_threshold is set, large numpy arrays are
+        saved as .npy files in {save_dir}/{stem}_arrays.
 
         Parameters
         ----------
@@ -385,6 +999,9 @@ class MSONable:
             Keyword arguments to pass to pickle.dump.
         strict : bool
             If True, will not allow you to overwrite existing files.
+        array_threshold : int
+            If set, numpy arrays with at least this many elements are saved
+            to separate .npy files instead of being stored in the json.
         """
         save(
             self,
@@ -393,16 +1010,20 @@ class MSONable:
             json_kwargs=json_kwargs,
             pickle_kwargs=pickle_kwargs,
             strict=strict,
+            array_threshold=array_threshold,
         )
 
     @classmethod
-    def load(cls, file_path):
+    def load(cls, file_path, mmap_mode=None):
         """Loads a class from a provided json file.
 
         Parameters
         ----------
         file_path : os.PathLike
             The json file to load from.
+        mmap_mode : str
+            If set, arrays saved to .npy files are memory-mapped with this
+            mode (see numpy.load) instead of being read into memory.
 
         Returns
         -------
@@ -410,7 +1031,7 @@ class MSONable:
             An instance of the class being reloaded.
         """
 
-        d = load2dict(file_path)
+        d = load2dict(file_path, mmap_mode=mmap_mode)
         return cls.from_dict(d)
 
 
@@ -421,6 +1042,7 @@ def save(
     json_kwargs=None,
     pickle_kwargs=None,
     strict=True,
+    array_threshold=None,
 ):
     """Utility that uses the standard tools of MSONable to convert the
     class to json format, but also save it to disk. In addition, this
@@ -433,7 +1055,9 @@ def save(
     the location {save_dir}/class.json. For a partially MSONable class,
     additional information will be saved to the save directory at
     {save_dir}. This includes a pickled object for each attribute that
-    e serialized.
+    e serialized. If array_threshold is set, large numpy arrays are
+    saved as .npy files in {save_dir}/{stem}_arrays, which load2dict can
+    memory-map.
 
     Args:
     obj : Object
@@ -451,6 +1075,9 @@ def save(
         Keyword arguments to pass to pickle.dump.
     strict : bool
         If True, will not allow you to overwrite existing files.
+    array_threshold : int
+        If set, numpy arrays with at least this many elements are saved
+        to separate .npy files instead of being stored in the json.
     """
 
     json_path = Path(json_path)
@@ -459,13 +1086,17 @@ def save(
     json_kwargs = json_kwargs or {}
     pickle_kwargs = pickle_kwargs or {}
 
-    encoded, name_object_map = partial_monty_encode(obj, json_kwargs)
+    encoder = MontyEncoder(
+        allow_unserializable_objects=True,
+        **{**(json_kwargs or {}), "array_sidecar_threshold": array_threshold},
+    )
 
     if mkdir:
         save_dir.mkdir(exist_ok=True, parents=True)
 
-    # Define the pickle path
+    # Define the pickle path and the directory holding the array files
     pickle_path = save_dir / f"{json_path.stem}.pkl"
+    array_dir = _get_array_dir(json_path)
 
     # Check if the files exist and the strict parameter is True
     if strict and json_path.exists():
@@ -473,30 +1104,53 @@ def save(
     if strict and pickle_path.exists():
         raise FileExistsError(f"strict is true and file {pickle_path} exists")
 
-    # Save the json file
-    with open(json_path, "w", encoding="utf-8") as outfile:
-        outfile.write(encoded)
+    # Save the json file, which is written incrementally rather than
+    # encoded to a string first
+    try:
+        with open(json_path, "w", encoding="utf-8") as outfile:
+            _write_json(encoder, obj, outfile)
+    except BaseException:
+        json_path.unlink(missing_ok=True)
+        raise
+    name_object_map = encoder._name_object_map
+    name_array_map = encoder._name_array_map
+
+    # Whether arrays are saved separately is only known after encoding
+    if strict and name_array_map and array_dir.exists():
+        json_path.unlink()
+        raise FileExistsError(f"strict is true and directory {array_dir} exists")
 
     # Save the pickle file if we have anything to save from the name_object_map
     if name_object_map is not None:
         with open(pickle_path, "wb") as f:
             pickle.dump(name_object_map, f, **pickle_kwargs)
 
+    # Save each large array to its own .npy file so that it can be memory-mapped
+    if name_array_map:
+        import numpy as np
+
+        array_dir.mkdir(exist_ok=True)
+        for name, arr in name_array_map.items():
+            np.save(array_dir / f"{name}.npy", arr, allow_pickle=False)
 
-def load(path):
+
+def load(path, mmap_mode=None):
     """Loads a json file that was saved using MSONable.save.
 
     Parameters
     ----------
     path : os.PathLike
         Path to the json file to load.
+    mmap_mode : str
+        If set, arrays saved to .npy files are memory-mapped with this
+        mode (see numpy.load) instead of being read into memory.
 
     Returns
     -------
     MSONable
     """
 
-    d = load2dict(path)
+    d = load2dict(path, mmap_mode=mmap_mode)
     module = d["@module"]
     klass = d["@class"]
     module = import_module(module)
@@ -504,7 +1158,7 @@ def load(path):
     return klass.from_dict(d)
 
 
-def load2dict(file_path) -> dict:
+def load2dict(file_path, mmap_mode=None) -> dict:
     """Load a serialized json file into a dictionary.
 
     Assumes that you saved using `save` and will
@@ -512,6 +1166,9 @@ def load2dict(file_path) -> dict:
 
     Arg:
         file_path: (str) Path to the json file.
+        mmap_mode: (str) If set, arrays saved to .npy files are
+            memory-mapped with this mode (e.g. "r", see numpy.load) instead
+            of being read into memory.
 
     Returns:
         (dict) The dictionary representation of the json file.
@@ -519,16 +1176,42 @@ def load2dict(file_path) -> dict:
     json_path = Path(file_path)
     save_dir = json_path.parent
     pickle_path = save_dir / f"{json_path.stem}.pkl"
+    array_dir = _get_array_dir(json_path)
 
     with open(json_path, "r", encoding="utf-8") as infile:
         d = json.loads(infile.read())
 
+    if array_dir.is_dir():
+        d = _recursive_array_reference_replacement(d, array_dir, mmap_mode)
+
     if pickle_path.exists():
         name_object_map = pickle.load(open(pickle_path, "rb"))
         d = _recursive_name_object_map_replacement(d, name_object_map)
     return d
 
 
+def _get_array_dir(json_path: Path) -> Path:
+    return json_path.parent / f"{json_path.stem}_arrays"
+
+
+def _recursive_array_reference_replacement(d, array_dir, mmap_mode):
+    if isinstance(d, dict):
+        if "@array_reference" in d:
+            import numpy as np
+
+            name = d["@array_reference"]
+            return np.load(array_dir / f"{name}.npy", mmap_mode=mmap_mode)
+        return {
+            k: _recursive_array_reference_replacement(v, array_dir, mmap_mode)
+            for k, v in d.items()
+        }
+    elif isinstance(d, list):
+        return [
+            _recursive_array_reference_replacement(x, array_dir, mmap_mode) for x in d
+        ]
+    return d
+
+
 def _recursive_name_object_map_replacement(d, name_object_map):
     if isinstance(d, dict):
         if "@object_reference" in d:
@@ -543,6 +1226,440 @@ def _recursive_name_object_map_replacement(d, name_object_map):
     return d
 
 
+# Encoders keyed on the fully qualified name of a type, and decoders keyed on
+# (module, class) as found in the "@module" and "@class" keys.
+_ENCODERS: dict[str, Callable[[MontyEncoder, Any], Any]] = {}
+_DECODERS: dict[tuple[str, str], Callable[[MontyDecoder, dict], Any]] = {}
+
+# Encoder resolved for each type, including subclasses of registered types
+_ENCODER_DISPATCH: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def register_encoder(
+    type_or_qualname: type | str, fn: Callable[[MontyEncoder, Any], Any]
+) -> None:
+    """
+    Register a function used by MontyEncoder to encode objects of a type.
+    Registered encoders take precedence over the as_dict protocol.
+
+    Args:
+        type_or_qualname (type | str): The type, or its fully qualified name
+            such as "pandas.core.frame.DataFrame", which avoids importing the
+            module defining it. Instances of subclasses are encoded with the
+            encoder of the closest registered class in their MRO.
+        fn: Function called as fn(encoder, obj) that returns a json
+            serializable representation of obj. For MontyDecoder to decode
+            it, this should be a dict with "@module" and "@class" keys
+            referring to a class with a from_dict method or to a decoder
+            registered with register_decoder.
+    """
+    if isinstance(type_or_qualname, type):
+        type_or_qualname = (
+            f"{type_or_qualname.__module__}.{type_or_qualname.__qualname__}"
+        )
+    _ENCODERS[type_or_qualname] = fn
+    _ENCODER_DISPATCH.clear()
+
+
+def register_decoder(
+    module: str, classname: str, fn: Callable[[MontyDecoder, dict], Any]
+) -> None:
+    """
+    Register a function used by MontyDecoder to decode dicts with the given
+    "@module" and "@class" values, after redirects have been applied.
+    Registered decoders take precedence over the from_dict protocol.
+
+    Args:
+        module (str): Value of the "@module" key.
+        classname (str): Value of the "@class" key.
+        fn: Function called as fn(decoder, d) with the dict to decode that
+            returns the decoded object.
+    """
+    _DECODERS[(module, classname)] = fn
+
+
+def _get_encoder(cls: type) -> Callable[[MontyEncoder, Any], Any] | None:
+    try:
+        return _ENCODER_DISPATCH[cls]
+    except KeyError:
+        pass
+
+    encode = None
+    for klass in cls.__mro__:
+        encode = _ENCODERS.get(f"{klass.__module__}.{klass.__qualname__}")
+        if encode is not None:
+            break
+    _ENCODER_DISPATCH[cls] = encode
+    return encode
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_EPOCH_UTC = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def _encode_datetime(encoder: MontyEncoder, o: datetime.datetime) -> dict:
+    if encoder._datetime_encoding == "epoch":
+        offset = o.utcoffset()
+        if offset is None:
+            return {
+                "@module": "datetime",
+                "@class": "datetime",
+                "epoch_us": (o - _EPOCH) // _MICROSECOND,
+            }
+        return {
+            "@module": "datetime",
+            "@class": "datetime",
+            "epoch_us": (o - _EPOCH_UTC) // _MICROSECOND,
+            "utcoffset": offset.total_seconds(),
+        }
+    return {"@module": "datetime", "@class": "datetime", "string": str(o)}
+
+
+def _decode_datetime(decoder: MontyDecoder, d: dict) -> datetime.datetime:
+    if "epoch_us" in d:
+        delta = datetime.timedelta(microseconds=d["epoch_us"])
+        if d.get("utcoffset") is None:
+            return _EPOCH + delta
+        tz = datetime.timezone(datetime.timedelta(seconds=d["utcoffset"]))
+        return (_EPOCH_UTC + delta).astimezone(tz)
+
+    try:
+        # str(datetime) is the isoformat with a space as separator
+        return datetime.datetime.fromisoformat(d["string"])
+    except ValueError:
+        pass
+    try:
+        # Remove timezone info in the form of "+xx:00"
+        return datetime.datetime.strptime(
+            d["string"].split("+")[0], "%Y-%m-%d %H:%M:%S.%f"
+        )
+    except ValueError:
+        return datetime.datetime.strptime(
+            d["string"].split("+")[0], "%Y-%m-%d %H:%M:%S"
+        )
+
+
+def _encode_uuid(encoder: MontyEncoder, o: UUID) -> dict:
+    return {"@module": "uuid", "@class": "UUID", "string": str(o)}
+
+
+def _decode_uuid(decoder: MontyDecoder, d: dict) -> UUID:
+    return UUID(d["string"])
+
+
+def _encode_path(encoder: MontyEncoder, o: Path) -> dict:
+    return {"@module": "pathlib", "@class": "Path", "string": str(o)}
+
+
+def _decode_path(decoder: MontyDecoder, d: dict) -> Path:
+    return Path(d["string"])
+
+
+def _encode_torch_tensor(encoder: MontyEncoder, o) -> dict:
+    if encoder._array_encoding != "list":
+        try:
+            arr = o.detach().cpu().resolve_conj().resolve_neg().numpy()
+        except TypeError:
+            # dtypes without a numpy equivalent, e.g. bfloat16
+            pass
+        else:
+            return {
+                "@module": "torch",
+                "@class": "Tensor",
+                **_encode_array_buffer(arr, encoder._array_encoding),
+            }
+
+    d: dict[str, Any] = {
+        "@module": "torch",
+        "@class": "Tensor",
+        "dtype": o.type(),
+        "size": list(o.size()),
+    }
+    if "Complex" in o.type():
+        d["data"] = [o.real.tolist(), o.imag.tolist()]
+    else:
+        d["data"] = o.tolist()
+    return d
+
+
+def _decode_torch_tensor(decoder: MontyDecoder, d: dict) -> Any:
+    torch = _import_optional("torch")  # import torch is very expensive
+    if torch is None:
+        return _UNDECODED
+
+    if "encoding" in d:
+        return torch.from_numpy(_decode_array_buffer(d))
+
+    if "Complex" in d["dtype"]:
+        if "size" in d and d["data"] == [[], []]:
+            return torch.empty(d["size"]).type(d["dtype"])
+
+        import numpy as np
+
+        real, imag = d["data"]
+        return torch.from_numpy(np.array(real) + np.array(imag) * 1j).type(d["dtype"])
+
+    if "size" in d and d["data"] == []:
+        return torch.empty(d["size"]).type(d["dtype"])
+
+    return torch.tensor(d["data"]).type(d["dtype"])
+
+
+def _encode_ndarray(encoder: MontyEncoder, o: np.ndarray) -> dict:
+    if (
+        encoder._array_sidecar_threshold is not None
+        and o.size >= encoder._array_sidecar_threshold
+        and o.dtype.kind != "O"
+    ):
+        return encoder._update_name_array_map(o)
+    if encoder._float32_arrays and o.dtype.kind in "fc":
+        o = _downcast_float_array(o)
+    if encoder._delta_int_arrays and o.dtype.kind in "iu":
+        encoding = (
+            "delta-varint-zlib"
+            if encoder._array_encoding == "base64-zlib"
+            else "delta-varint"
+        )
+        d = _encode_delta_varint(o, encoding)
+        if d is not None:
+            return {"@module": "numpy", "@class": "array", **d}
+    if encoder._array_encoding != "list" and o.dtype.kind in "biufcmM":
+        return {
+            "@module": "numpy",
+            "@class": "array",
+            **_encode_array_buffer(o, encoder._array_encoding),
+        }
+    tolist = _float32_list if encoder._float32_arrays else _tolist
+    if str(o.dtype).startswith("complex"):
+        return {
+            "@module": "numpy",
+            "@class": "array",
+            "dtype": str(o.dtype),
+            "data": [tolist(o.real), tolist(o.imag)],
+        }
+    return {
+        "@module": "numpy",
+        "@class": "array",
+        "dtype": str(o.dtype),
+        "data": tolist(o),
+    }
+
+
+def _decode_ndarray(decoder: MontyDecoder, d: dict) -> np.ndarray:
+    import numpy as np
+
+    if "encoding" in d:
+        if d["encoding"] in _DELTA_ENCODINGS:
+            return _decode_delta_varint(d)
+        return _decode_array_buffer(d)
+    if d["dtype"].startswith("complex"):
+        return np.array(
+            [np.array(r) + np.array(i) * 1j for r, i in zip(*d["data"])],
+            dtype=d["dtype"],
+        )
+    return np.array(d["data"], dtype=d["dtype"])
+
+
+def _encode_numpy_generic(encoder: MontyEncoder, o: np.generic) -> Any:
+    return o.item()
+
+
+def _pandas_class(o) -> str:
+    # Subclasses are stored as the pandas class they derive from
+    if _check_type(o, "pandas.core.frame.DataFrame"):
+        return "DataFrame"
+    return "Series"
+
+
+def _encode_pandas(encoder: MontyEncoder, o) -> dict:
+    if encoder._dataframe_encoding == "columnar" and not any(
+        _check_type(idx, "pandas.core.indexes.multi.MultiIndex") for idx in o.axes
+    ):
+        return _encode_pandas_columnar(encoder, o)
+    return {
+        "@module": "pandas",
+        "@class": _pandas_class(o),
+        "data": o.to_json(default_handler=MontyEncoder().encode),
+    }
+
+
+def _encode_pandas_values(encoder: MontyEncoder, values) -> dict:
+    """Encode the values of a Series or an Index with their dtype."""
+    import numpy as np
+    import pandas as pd
+
+    encoding = encoder._array_encoding
+    if encoding == "list":
+        encoding = "base64"
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in "biufcmM":
+        return _encode_array_buffer(values.to_numpy(), encoding)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Categories are kept even if unused, along with their order
+        return {
+            "dtype": "category",
+            "categories": _encode_pandas_values(encoder, values.dtype.categories),
+            "ordered": bool(values.dtype.ordered),
+            "codes": _encode_array_buffer(values.array.codes, encoding),
+        }
+    # Object columns and other pandas extension dtypes, e.g. Int64, are
+    # stored as a list of values with missing values as None.
+    obj = np.array(values, dtype=object)
+    obj[pd.isna(obj)] = None
+    return {"dtype": str(values.dtype), "values": obj.tolist()}
+
+
+def _decode_pandas_values(decoder: MontyDecoder, d: dict) -> Any:
+    import pandas as pd
+
+    if "encoding" in d:
+        return _decode_array_buffer(d)
+    if "codes" in d:
+        dtype = pd.CategoricalDtype(
+            _decode_pandas_values(decoder, d["categories"]), ordered=d["ordered"]
+        )
+        return pd.Categorical.from_codes(_decode_array_buffer(d["codes"]), dtype=dtype)
+    return pd.array(decoder.process_decoded(d["values"]), dtype=d["dtype"])
+
+
+def _encode_pandas_index(encoder: MontyEncoder, index) -> dict:
+    if _check_type(index, "pandas.core.indexes.range.RangeIndex"):
+        return {
+            "name": index.name,
+            "start": index.start,
+            "stop": index.stop,
+            "step": index.step,
+        }
+    return {"name": index.name, **_encode_pandas_values(encoder, index)}
+
+
+def _decode_pandas_name(decoder: MontyDecoder, name) -> Any:
+    name = decoder.process_decoded(name)
+    # Tuples, which are common names in pandas, are stored as lists
+    return tuple(name) if isinstance(name, list) else name
+
+
+def _decode_pandas_index(decoder: MontyDecoder, d: dict) -> Any:
+    import pandas as pd
+
+    name = _decode_pandas_name(decoder, d["name"])
+    if "start" in d:
+        return pd.RangeIndex(d["start"], d["stop"], d["step"], name=name)
+    return pd.Index(_decode_pandas_values(decoder, d), name=name)
+
+
+def _encode_pandas_columnar(encoder: MontyEncoder, o) -> dict:
+    d = {
+        "@module": "pandas",
+        "@class": _pandas_class(o),
+        "encoding": "columnar",
+        "index": _encode_pandas_index(encoder, o.index),
+    }
+    if d["@class"] == "Series":
+        d["name"] = o.name
+        d["data"] = _encode_pandas_values(encoder, o)
+    else:
+        d["columns"] = _encode_pandas_index(encoder, o.columns)
+        d["data"] = [
+            _encode_pandas_values(encoder, o.iloc[:, i]) for i in range(o.shape[1])
+        ]
+    return d
+
+
+def _decode_pandas_dataframe(decoder: MontyDecoder, d: dict) -> Any:
+    pd = _import_optional("pandas")
+    if pd is None:
+        return _UNDECODED
+    if d.get("encoding") != "columnar":
+        return pd.DataFrame(MontyDecoder().decode(d["data"]))
+
+    # Columns are added by position, which allows duplicate column names
+    df = pd.DataFrame(
+        {i: _decode_pandas_values(decoder, col) for i, col in enumerate(d["data"])},
+        index=_decode_pandas_index(decoder, d["index"]),
+    )
+    df.columns = _decode_pandas_index(decoder, d["columns"])
+    return df
+
+
+def _decode_pandas_series(decoder: MontyDecoder, d: dict) -> Any:
+    pd = _import_optional("pandas")
+    if pd is None:
+        return _UNDECODED
+    if d.get("encoding") != "columnar":
+        return pd.Series(MontyDecoder().decode(d["data"]))
+    return pd.Series(
+        _decode_pandas_values(decoder, d["data"]),
+        index=_decode_pandas_index(decoder, d["index"]),
+        name=_decode_pandas_name(decoder, d["name"]),
+    )
+
+
+def _encode_pint_quantity(encoder: MontyEncoder, o) -> dict:
+    d: dict[str, Any] = {
+        "@module": "pint",
+        "@class": "Quantity",
+        "data": str(o),
+    }
+    module_version = getattr(_import_optional("pint"), "__version__", None)
+    d["@version"] = None if module_version is None else str(module_version)
+    return d
+
+
+def _decode_pint_quantity(decoder: MontyDecoder, d: dict) -> Any:
+    if _import_optional("pint") is None:
+        return _UNDECODED
+    registry = _get_unit_registry()
+    magnitude, _, units = d["data"].partition(" ")
+    try:
+        value: int | float = int(magnitude)
+    except ValueError:
+        try:
+            value = float(magnitude)
+        except ValueError:
+            # e.g. arrays or complex magnitudes
+            return registry.Quantity(d["data"])
+    try:
+        return registry.Quantity(value, _get_units(registry, units))
+    except (ValueError, AttributeError):
+        # Units that only parse with the magnitude, e.g. "1.0 / second"
+        return registry.Quantity(d["data"])
+
+
+def _encode_objectid(encoder: MontyEncoder, o) -> dict:
+    return {"@module": "bson.objectid", "@class": "ObjectId", "oid": str(o)}
+
+
+def _decode_objectid(decoder: MontyDecoder, d: dict) -> Any:
+    objectid = _import_optional("bson.objectid")
+    if objectid is None:
+        return _UNDECODED
+    return objectid.ObjectId(d["oid"])
+
+
+register_encoder(datetime.datetime, _encode_datetime)
+register_encoder(UUID, _encode_uuid)
+register_encoder(Path, _encode_path)
+register_encoder("torch.Tensor", _encode_torch_tensor)
+register_encoder("numpy.ndarray", _encode_ndarray)
+register_encoder("numpy.generic", _encode_numpy_generic)
+register_encoder("pandas.core.frame.DataFrame", _encode_pandas)
+register_encoder("pandas.core.series.Series", _encode_pandas)
+register_encoder("pint.Quantity", _encode_pint_quantity)
+register_encoder("pint.registry.Quantity", _encode_pint_quantity)
+register_encoder("bson.objectid.ObjectId", _encode_objectid)
+
+register_decoder("datetime", "datetime", _decode_datetime)
+register_decoder("uuid", "UUID", _decode_uuid)
+register_decoder("pathlib", "Path", _decode_path)
+register_decoder("torch", "Tensor", _decode_torch_tensor)
+register_decoder("numpy", "array", _decode_ndarray)
+register_decoder("pandas", "DataFrame", _decode_pandas_dataframe)
+register_decoder("pandas", "Series", _decode_pandas_series)
+register_decoder("pint", "Quantity", _decode_pint_quantity)
+register_decoder("bson.objectid", "ObjectId", _decode_objectid)
+
+
 class MontyEncoder(json.JSONEncoder):
     """
     A Json Encoder which supports the MSONable API, plus adds support for
@@ -550,15 +1667,134 @@ class MontyEncoder(json.JSONEncoder):
     Usage::
         # Add it as a *cls* keyword when using json.dump
         json.dumps(object, cls=MontyEncoder)
+
+        # Store numpy arrays as compressed raw buffers instead of lists
+        json.dumps(object, cls=MontyEncoder, array_encoding="base64-zlib")
+
+        # Store objects referenced several times only once
+        json.dumps(object, cls=MontyEncoder, dedup=True)
+
+        # Write floats with at most 6 significant digits
+        json.dumps(object, cls=MontyEncoder, float_precision=6)
     """
 
     def __init__(
-        self, *args, allow_unserializable_objects: bool = False, **kwargs
+        self,
+        *args,
+        allow_unserializable_objects: bool = False,
+        array_encoding: Literal["list", "base64", "base64-zlib"] = "list",
+        array_sidecar_threshold: int | None = None,
+        dedup: bool = False,
+        dataframe_encoding: Literal["json", "columnar"] = "json",
+        datetime_encoding: Literal["iso", "epoch"] = "iso",
+        float_precision: int | None = None,
+        float32_arrays: bool = False,
+        delta_int_arrays: bool = False,
+        **kwargs,
     ) -> None:
+        """
+        Args:
+            *args: Positional arguments passed to json.JSONEncoder.
+            allow_unserializable_objects (bool): If True, objects that cannot
+                be serialized are replaced by a reference and stored in a
+                name-object map instead of raising a TypeError.
+            array_encoding ("list" | "base64" | "base64-zlib"): How numpy
+                arrays and torch tensors are stored. "list" (default) stores
+                nested lists of values. "base64" stores the dtype, byte
+                order, shape and the raw buffer encoded as base64, which is
+                much faster and more compact for large numeric arrays.
+                "base64-zlib" additionally compresses the buffer. Arrays with
+                non-numeric dtypes and tensors with dtypes unsupported by
+                numpy, such as bfloat16, are always stored as lists.
+            array_sidecar_threshold (int | None): If set, numpy arrays with
+                at least this many elements are not encoded inline. They are
+                replaced by an @array_reference and collected in a name-array
+                map so that they can be stored alongside the JSON (see save).
+            dedup (bool): If True, an object encoded as a dict, such as an
+                MSONable or a numpy array, is written in full only the first
+                time it is encountered, with an "@id" key. Later occurrences
+                of the same object are written as {"@ref": id}, which
+                MontyDecoder resolves to a single shared instance. This also
+                allows encoding reference cycles between MSONables, although
+                these cannot be decoded. The objects nested in an MSONable
+                are only deduplicated if it uses the default
+                MSONable.as_dict, as overrides of as_dict are given nested
+                objects already converted to dicts. Circular references
+                through plain lists and dicts are still reported as errors.
+            dataframe_encoding ("json" | "columnar"): How pandas DataFrames
+                and Series are stored. "json" (default) stores the output of
+                their to_json method as a string. "columnar" stores the dtype
+                of each column and index, with numeric and datetime values
+                as raw buffers encoded as in array_encoding (base64 if
+                array_encoding is "list"). This is faster, more compact and
+                keeps dtypes and duplicate column names. Objects with a
+                MultiIndex are always stored with "json".
+            datetime_encoding ("iso" | "epoch"): How datetimes are stored.
+                "iso" (default) stores their string representation. "epoch"
+                stores the integer number of microseconds since the Unix
+                epoch, in UTC for timezone-aware datetimes, plus their UTC
+                offset in seconds, which is more compact. Both keep the
+                timezone offset, but not the name of the timezone.
+            float_precision (int | None): If set, floats, including the
+                elements of numpy arrays stored as lists, are rounded to
+                this many significant digits, so that the relative error is
+                at most 0.5 * 10 ** (1 - float_precision). Dict keys are
+                not rounded.
+            float32_arrays (bool): If True, numpy arrays of float64 and
+                wider floats are stored as float32 (complex arrays as
+                complex64) and decoded as such, with a relative error of at
+                most 2 ** -24. As lists, values are written with the
+                shortest repr of their float32 value.
+            delta_int_arrays (bool): If True, monotonic numpy integer arrays
+                are stored as varints of the differences between consecutive
+                elements, which typically takes one or two bytes per element
+                for indices or timestamps. The varints are compressed with
+                zlib if array_encoding is "base64-zlib".
+            **kwargs: Keyword arguments passed to json.JSONEncoder.
+        """
         super().__init__(*args, **kwargs)
+        if array_encoding != "list" and array_encoding not in _ARRAY_BUFFER_ENCODINGS:
+            raise ValueError(f"Invalid array_encoding: {array_encoding}")
+        if dataframe_encoding not in ("json", "columnar"):
+            raise ValueError(f"Invalid dataframe_encoding: {dataframe_encoding}")
+        if datetime_encoding not in ("iso", "epoch"):
+            raise ValueError(f"Invalid datetime_encoding: {datetime_encoding}")
+        if float_precision is not None and not 1 <= float_precision <= 17:
+            raise ValueError(f"Invalid float_precision: {float_precision}")
         self._allow_unserializable_objects = allow_unserializable_objects
+        self._array_encoding = array_encoding
+        self._dataframe_encoding = dataframe_encoding
+        self._datetime_encoding = datetime_encoding
+        self._float_precision = float_precision
+        self._float32_arrays = float32_arrays
+        self._delta_int_arrays = delta_int_arrays
         self._name_object_map: dict[str, Any] = {}
         self._index: int = 0
+        self._array_sidecar_threshold = array_sidecar_threshold
+        self._name_array_map: dict[str, np.ndarray] = {}
+        # Maps the id of objects already encoded to their @id and the object
+        # itself, which must be kept alive for its id not to be reused.
+        self._shared: dict[int, tuple[int, Any]] | None = {} if dedup else None
+
+    def iterencode(self, o, _one_shot=False):
+        """
+        Encode the given object and yield each string representation as
+        available. See json.JSONEncoder.iterencode.
+        """
+        if self._shared is None and self._float_precision is None:
+            return super().iterencode(o, _one_shot)
+        return self._iterencode(o, _one_shot)
+
+    def _iterencode(self, o, _one_shot):
+        # The C encoder does not allow customizing how floats are written, so
+        # they are rounded beforehand, here and in the output of default.
+        if self._float_precision is not None:
+            o = _round_floats(o, self._float_precision)
+        if self._shared is None:
+            yield from super().iterencode(o, _one_shot)
+            return
+        self._shared.clear()
+        yield from super().iterencode(o, _one_shot)
 
     def _update_name_object_map(self, o):
         name = f"{self._index:012}-{str(uuid4())}"
@@ -566,13 +1802,21 @@ class MontyEncoder(json.JSONEncoder):
         self._name_object_map[name] = o
         return {"@object_reference": name}
 
+    def _update_name_array_map(self, o):
+        name = f"{len(self._name_array_map):012}"
+        self._name_array_map[name] = o
+        return {"@array_reference": name}
+
     def default(self, o) -> dict:
         """
-        Overriding default method for JSON encoding. This method does two
-        things: (a) If an object has a to_dict property, return the to_dict
-        output. (b) If the @module and @class keys are not in the to_dict,
-        add them to the output automatically. If the object has no to_dict
-        property, the default Python json encoder default method is called.
+        Overriding default method for JSON encoding. Objects of a type with
+        an encoder registered with register_encoder (e.g. datetime, numpy
+        arrays or pandas DataFrames) are encoded with it. Otherwise, this
+        method does two things: (a) If an object has a to_dict property,
+        return the to_dict output. (b) If the @module and @class keys are not
+        in the to_dict, add them to the output automatically. If the object
+        has no to_dict property, the default Python json encoder default
+        method is called.
 
         Args:
             o: Python object.
@@ -580,81 +1824,31 @@ class MontyEncoder(json.JSONEncoder):
         Return:
             Python dict representation.
         """
-        if isinstance(o, datetime.datetime):
-            return {
-                "@module": "datetime",
-                "@class": "datetime",
-                "string": str(o),
-            }
-        if isinstance(o, UUID):
-            return {"@module": "uuid", "@class": "UUID", "string": str(o)}
-        if isinstance(o, Path):
-            return {"@module": "pathlib", "@class": "Path", "string": str(o)}
-
-        # Support for Pytorch Tensors
-        if _check_type(o, "torch.Tensor"):
-            d: dict[str, Any] = {
-                "@module": "torch",
-                "@class": "Tensor",
-                "dtype": o.type(),
-                "size": list(o.size()),
-            }
-            if "Complex" in o.type():
-                d["data"] = [o.real.tolist(), o.imag.tolist()]
+        if self._shared is None:
+            d = self._default(o)
+        else:
+            if type(o) is _Deferred:
+                o = o.obj
+            shared = self._shared.get(id(o))
+            if shared is not None:
+                return {"@ref": shared[0]}
+            if _defers_nested(o):
+                with _deferred_as_dict(_Deferred):
+                    d = self._default(o)
             else:
-                d["data"] = o.numpy().tolist()
-            return d
-
-        if isinstance(o, np.ndarray):
-            if str(o.dtype).startswith("complex"):
-                return {
-                    "@module": "numpy",
-                    "@class": "array",
-                    "dtype": str(o.dtype),
-                    "data": [o.real.tolist(), o.imag.tolist()],
-                }
-            return {
-                "@module": "numpy",
-                "@class": "array",
-                "dtype": str(o.dtype),
-                "data": o.tolist(),
-            }
-
-        if isinstance(o, np.generic):
-            return o.item()
-
-        if _check_type(o, "pandas.core.frame.DataFrame"):
-            return {
-                "@module": "pandas",
-                "@class": "DataFrame",
-                "data": o.to_json(default_handler=MontyEncoder().encode),
-            }
-        if _check_type(o, "pandas.core.series.Series"):
-            return {
-                "@module": "pandas",
-                "@class": "Series",
-                "data": o.to_json(default_handler=MontyEncoder().encode),
-            }
+                d = self._default(o)
+            if isinstance(d, dict) and "@module" in d and "@object_reference" not in d:
+                ref = len(self._shared)
+                self._shared[id(o)] = (ref, o)
+                d = {"@id": ref, **d}
+        if self._float_precision is not None:
+            d = _round_floats(d, self._float_precision)
+        return d
 
-        if _check_type(o, "pint.Quantity"):
-            d = {
-                "@module": "pint",
-                "@class": "Quantity",
-                "data": str(o),
-            }
-            try:
-                module_version = import_module("pint").__version__
-                d["@version"] = str(module_version)
-            except (AttributeError, ImportError):
-                d["@version"] = None
-            return d
-
-        if bson is not None and isinstance(o, bson.objectid.ObjectId):
-            return {
-                "@module": "bson.objectid",
-                "@class": "ObjectId",
-                "oid": str(o),
-            }
+    def _default(self, o):
+        encode = _get_encoder(type(o))
+        if encode is not None:
+            return encode(self, o)
 
         if callable(o) and not isinstance(o, MSONable):
             try:
@@ -674,7 +1868,7 @@ class MontyEncoder(json.JSONEncoder):
                 and dataclasses.is_dataclass(o)
             ):
                 # This handles dataclasses that are not subclasses of MSONAble.
-                d = dataclasses.asdict(o)  # type: ignore[call-overload, arg-type]
+                d = _dataclass_as_dict(o)
             elif hasattr(o, "as_dict"):
                 d = o.as_dict()
             elif isinstance(o, Enum):
@@ -705,6 +1899,372 @@ class MontyEncoder(json.JSONEncoder):
             return json.JSONEncoder.default(self, o)
 
 
+def orjson_dumps(
+    obj: object,
+    indent: int | None = None,
+    sort_keys: bool = False,
+    cls: type[MontyEncoder] | None = None,
+    **kwargs,
+) -> bytes:
+    """
+    Serialize an object to json with orjson, using MontyEncoder only for the
+    objects that orjson does not handle natively. This is several times
+    faster than json.dumps(obj, cls=MontyEncoder) for plain lists and dicts
+    and for numpy arrays, but only slightly faster for MSONables, whose
+    as_dict method remains the bottleneck.
+
+    Numpy arrays, datetimes and dataclasses are passed to MontyEncoder, so
+    the output decodes to the same objects as the output of the standard
+    library, with these exceptions imposed by orjson:
+
+    - NaN and infinite floats are written as null.
+    - Enums and UUIDs are only tagged within the as_dict of MSONables and
+      as attributes of dataclasses. Elsewhere, e.g. at the top level or in
+      the lists and dicts passed, they are written as their value and as a
+      string respectively.
+
+    Args:
+        obj: Object to serialize.
+        indent (int | None): If truthy, indent the output with two spaces,
+            the only indentation orjson supports.
+        sort_keys (bool): Whether to sort the keys of dicts.
+        cls (type[MontyEncoder]): Encoder class handling the objects not
+            supported by orjson. Defaults to MontyEncoder.
+        **kwargs: Keyword arguments passed to the encoder, e.g.
+            array_encoding.
+
+    Returns:
+        bytes: UTF-8 encoded json.
+    """
+    orjson = _import_optional("orjson")
+    if orjson is None:
+        raise RuntimeError("orjson must be installed to use the orjson engine.")
+
+    encoder = (cls or MontyEncoder)(**kwargs)
+    if encoder._float_precision is not None:
+        raise ValueError("float_precision is not supported by orjson.")
+
+    # Numpy arrays, datetimes and dataclasses are deliberately not serialized
+    # natively by orjson so that they keep their "@module"/"@class" tags.
+    option = (
+        orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_NON_STR_KEYS
+    )
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+
+    def default(o):
+        if isinstance(o, tuple):
+            # e.g. namedtuples, which json.dumps writes as lists
+            return list(o)
+        d = encoder.default(o)
+        if isinstance(d, dict) and any(map(_is_orjson_native, d.values())):
+            d = {
+                k: encoder.default(v) if _is_orjson_native(v) else v
+                for k, v in d.items()
+            }
+        return d
+
+    # Enums and UUIDs are tagged in as_dict, which visits all the values of
+    # MSONables anyway, and in the dicts returned by the encoder.
+    token = _ENCODE_ORJSON_NATIVE.set(encoder.default)
+    try:
+        return orjson.dumps(obj, default=default, option=option)
+    finally:
+        _ENCODE_ORJSON_NATIVE.reset(token)
+
+
+def _is_orjson_native(o) -> bool:
+    # Whether o is an Enum or a UUID, which orjson writes as a plain value
+    # but json.dumps passes to the encoder
+    return isinstance(o, UUID) or (
+        isinstance(o, Enum) and not isinstance(o, (str, int, float))
+    )
+
+
+# Subtrees with at most this many list items and dict values are encoded in
+# one call to the C encoder when writing json incrementally.
+_CHUNK_NODE_LIMIT = 4096
+
+
+def _count_nodes(o, limit: int) -> int:
+    # The number of list items and dict values in o, or limit + 1 if there
+    # are more than limit. Objects that need encoder.default count as
+    # exceeding it, so that they are converted first and their output
+    # examined.
+    n = 0
+    stack = [o]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, dict):
+            values: Any = o.values()
+        elif isinstance(o, (list, tuple)):
+            values = o
+        elif isinstance(o, (str, int, float)) or o is None:
+            continue
+        else:
+            return limit + 1
+        n += len(values)
+        if n > limit:
+            return limit + 1
+        # Skip the common case of values that are all scalars in C
+        if not _JSON_SCALAR_TYPES.issuperset(map(type, values)):
+            stack.extend(v for v in values if not isinstance(v, (str, int, float)))
+    return n
+
+
+def _iterencode_chunks(encoder: json.JSONEncoder, o) -> Iterator[str]:
+    """
+    Encode o like encoder.encode, yielding the json in chunks. Large lists
+    and dicts are written a few items at a time, with consecutive items
+    holding at most _CHUNK_NODE_LIMIT values encoded in one go by the C
+    encoder, which is several times faster than json.JSONEncoder.iterencode.
+    The output is identical to that of encoder.encode.
+    """
+    if encoder.indent is not None or getattr(encoder, "_shared", None) is not None:
+        # The standard library writes indented json with iterencode anyway,
+        # and deduplication needs a single pass over the object.
+        yield from encoder.iterencode(o)
+        return
+
+    limit = _CHUNK_NODE_LIMIT
+    markers: set[int] | None = set() if encoder.check_circular else None
+    item_separator = encoder.item_separator
+    key_separator = encoder.key_separator
+
+    def _encode_key(key) -> str | None:
+        if isinstance(key, str):
+            return encoder.encode(key)
+        if isinstance(key, (int, float)) or key is None:
+            return f'"{encoder.encode(key)}"'
+        if encoder.skipkeys:
+            return None
+        raise TypeError(
+            f"keys must be str, int, float, bool or None, not {key.__class__.__name__}"
+        )
+
+    def _iterencode_items(items, is_dict: bool) -> Iterator[str]:
+        # Encode the items of a container, without its brackets
+        first = True
+        batch: list = []
+        size = 0
+        for item in items:
+            n = 1 + _count_nodes(item[1] if is_dict else item, limit)
+            if batch and size + n > limit:
+                # Encode the batch as a container and strip its brackets
+                encoded = encoder.encode(dict(batch) if is_dict else batch)[1:-1]
+                if encoded:
+                    yield encoded if first else item_separator + encoded
+                    first = False
+                batch.clear()
+                size = 0
+            if n <= limit:
+                batch.append(item)
+                size += n
+                continue
+
+            if is_dict:
+                key = _encode_key(item[0])
+                if key is None:
+                    continue
+                if not first:
+                    yield item_separator
+                yield key + key_separator
+                value = item[1]
+            else:
+                if not first:
+                    yield item_separator
+                value = item
+            first = False
+            yield from _iterencode(value)
+
+        if batch:
+            encoded = encoder.encode(dict(batch) if is_dict else batch)[1:-1]
+            if encoded:
+                yield encoded if first else item_separator + encoded
+
+    def _iterencode(o) -> Iterator[str]:
+        if _count_nodes(o, limit) <= limit:
+            yield encoder.encode(o)
+            return
+
+        if markers is not None:
+            if id(o) in markers:
+                raise ValueError("Circular reference detected")
+            markers.add(id(o))
+
+        if isinstance(o, dict):
+            yield "{"
+            items = sorted(o.items()) if encoder.sort_keys else o.items()
+            yield from _iterencode_items(items, is_dict=True)
+            yield "}"
+        elif isinstance(o, (list, tuple)):
+            yield "["
+            yield from _iterencode_items(o, is_dict=False)
+            yield "]"
+        else:
+            yield from _iterencode(encoder.default(o))
+
+        if markers is not None:
+            markers.discard(id(o))
+
+    yield from _iterencode(o)
+
+
+def _write_json(
+    encoder: json.JSONEncoder, o, fp: IO[str], chunk_size: int = 2**16
+) -> None:
+    """Write the json of o to a text file in chunks of about chunk_size."""
+    buffer: list[str] = []
+    size = 0
+    for chunk in _iterencode_chunks(encoder, o):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= chunk_size:
+            fp.write("".join(buffer))
+            buffer.clear()
+            size = 0
+    fp.write("".join(buffer))
+
+
+class _SharedObjects:
+    """
+    Objects with an "@id" decoded so far in a document, shared by the
+    decoders used by from_dict and by lazy containers. References to an
+    "@id" not decoded yet are resolved by decoding its dict, found in an
+    index of the raw document built the first time it is needed.
+    """
+
+    def __init__(self, root) -> None:
+        self.objects: dict[int, Any] = {}
+        self._root = root
+        self._raw: dict[int, dict] | None = None
+
+    def find(self, ref: int) -> dict | None:
+        """The raw dict with the given "@id", or None if there is none."""
+        if self._raw is None:
+            self._raw = {}
+            stack = [self._root]
+            while stack:
+                o = stack.pop()
+                if isinstance(o, dict):
+                    ref_ = o.get("@id")
+                    if type(ref_) is int and "@module" in o:
+                        self._raw.setdefault(ref_, o)
+                    stack.extend(o.values())
+                elif isinstance(o, list):
+                    stack.extend(o)
+            self._root = None
+        return self._raw.get(ref)
+
+
+# Shared objects of the document decoded by the outermost call to
+# MontyDecoder.process_decoded, or by the lazy container being accessed.
+_DECODED_SHARED: ContextVar[_SharedObjects | None] = ContextVar(
+    "_DECODED_SHARED", default=None
+)
+
+
+# Longest string values interned by MontyDecoder(intern_strings=True)
+_INTERN_MAX_LENGTH = 64
+_METADATA_KEYS = ("@module", "@class", "@version", "@id")
+
+
+def _intern_strings(obj) -> int:
+    """
+    Intern the dict keys and short string values in nested dicts and lists
+    in place. Returns the size of the distinct strings replaced by an
+    interned copy, which are freed unless referenced elsewhere.
+    """
+    replaced: dict[int, int] = {}
+    intern = sys.intern
+
+    def _intern(s: str) -> str:
+        interned = intern(s)
+        if interned is not s:
+            replaced[id(s)] = sys.getsizeof(s)
+        return interned
+
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, dict):
+            items = list(o.items())
+            o.clear()
+            for k, v in items:
+                if type(k) is str:
+                    k = _intern(k)
+                if type(v) is str:
+                    if len(v) <= _INTERN_MAX_LENGTH:
+                        v = _intern(v)
+                elif isinstance(v, (dict, list)):
+                    stack.append(v)
+                o[k] = v
+        elif isinstance(o, list):
+            for i, v in enumerate(o):
+                if type(v) is str:
+                    if len(v) <= _INTERN_MAX_LENGTH:
+                        o[i] = _intern(v)
+                elif isinstance(v, (dict, list)):
+                    stack.append(v)
+    return sum(replaced.values())
+
+
+def _drop_metadata(obj) -> tuple[Any, int]:
+    """
+    Remove the metadata keys from the tagged dicts, i.e. with "@module" and
+    "@class", left in decoded output. These dicts and the lists and dicts
+    containing them are copied rather than modified. Returns the new output
+    and an estimate of the memory freed.
+    """
+    if not isinstance(obj, (dict, list)):
+        return obj, 0
+
+    saved = 0
+    getsizeof = sys.getsizeof
+    # Frames as in MontyDecoder._process_decoded
+    stack: list[list] = [
+        [obj, enumerate(obj.values() if isinstance(obj, dict) else obj), None, 0]
+    ]
+    while True:
+        frame = stack[-1]
+        container, values, copied, _ = frame
+        for i, v in values:
+            if isinstance(v, (dict, list)):
+                stack.append(
+                    [v, enumerate(v.values() if isinstance(v, dict) else v), None, i]
+                )
+                break
+            if copied is not None:
+                copied.append(v)
+        else:
+            stack.pop()
+            result = container
+            if isinstance(container, dict):
+                tagged = "@module" in container and "@class" in container
+                if copied is not None or tagged:
+                    result = dict(
+                        zip(container, container.values() if copied is None else copied)
+                    )
+                if tagged:
+                    for key in _METADATA_KEYS:
+                        if key in result:
+                            saved += getsizeof(result.pop(key))
+            elif copied is not None:
+                result = copied
+            if not stack:
+                return result, saved
+
+            parent = stack[-1]
+            if parent[2] is None and result is not container:
+                parent[2] = _copy_prefix(parent[0], frame[3])
+            if parent[2] is not None:
+                parent[2].append(result)
+
+
 class MontyDecoder(json.JSONDecoder):
     """
     A Json Decoder which supports the MSONable API. By default, the
@@ -718,172 +2278,283 @@ class MontyDecoder(json.JSONDecoder):
 
         # Add it as a *cls* keyword when using json.load
         json.loads(json_string, cls=MontyDecoder)
+
+        # Only decode the parts of a large document that are accessed
+        json.loads(json_string, cls=MontyDecoder, lazy=True)
     """
 
+    def __init__(
+        self,
+        *args,
+        lazy: bool = False,
+        parser: Literal["auto", "json", "bson", "orjson"] = "auto",
+        intern_strings: bool = False,
+        drop_metadata: bool = False,
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            lazy (bool): If True, untagged dicts and lists are returned as
+                LazyDecodedDict and LazyDecodedList, which decode their
+                values when first accessed and cache the result. A
+                document whose root is itself an MSONable is decoded
+                eagerly as a whole.
+            parser ("auto" | "json" | "bson" | "orjson"): Parser used by
+                decode. "bson" uses bson's json_util, which also decodes
+                MongoDB extended json such as {"$oid": ...} but is much
+                slower. "auto" (default) only uses it if bson is installed
+                and the string contains a key starting with "$", and the
+                standard library json otherwise. "orjson" requires orjson.
+            intern_strings (bool): If True, dict keys and string values of
+                at most 64 characters, such as class and module names, are
+                interned with sys.intern before decoding, so that documents
+                sharing the same keys and values also share the strings.
+                This is done in place in the dicts and lists passed to
+                process_decoded.
+            drop_metadata (bool): If True, the "@module", "@class",
+                "@version" and "@id" keys are removed from the tagged dicts
+                left in the decoded output, i.e. those that could not be
+                decoded, which are copied rather than modified. Untagged
+                dicts are kept as they are. Not supported with lazy.
+            *args: Positional arguments passed to json.JSONDecoder.
+            **kwargs: Keyword arguments passed to json.JSONDecoder.
+        """
+        super().__init__(*args, **kwargs)
+        if parser not in ("auto", "json", "bson", "orjson"):
+            raise ValueError(f"Invalid parser: {parser}")
+        if lazy and drop_metadata:
+            raise ValueError("drop_metadata is not supported with lazy.")
+        if parser == "bson" and _import_optional("bson.json_util") is None:
+            raise RuntimeError("bson must be installed to use the bson parser.")
+        if parser == "orjson" and _import_optional("orjson") is None:
+            raise RuntimeError("orjson must be installed to use the orjson parser.")
+        self.lazy = lazy
+        self.parser = parser
+        self.intern_strings = intern_strings
+        self.drop_metadata = drop_metadata
+        # Estimate of the memory freed by intern_strings and drop_metadata
+        # since the decoder was created, in bytes
+        self.bytes_saved = 0
+
     def process_decoded(self, d):
         """
-        Recursive method to support decoding dicts and lists containing
-        pymatgen objects.
+        Decode dicts and lists containing MSONable and other supported
+        objects. Nested dicts and lists are traversed with an explicit stack
+        rather than recursion, so that arbitrarily deep documents can be
+        decoded. Dicts and lists that contain nothing to decode are returned
+        as is instead of being copied.
+
+        References written by MontyEncoder(dedup=True), i.e. dicts whose
+        only key is "@ref", are resolved to the object with the same "@id"
+        in the same document. Such dicts are kept as they are if the
+        document has no matching "@id".
         """
+        if _DECODED_SHARED.get() is not None:
+            if self.lazy:
+                return self._process_lazy(d)
+            return self._process_decoded(d)
+
+        if self.intern_strings:
+            self.bytes_saved += _intern_strings(d)
+        token = _DECODED_SHARED.set(_SharedObjects(d))
+        try:
+            if self.lazy:
+                return self._process_lazy(d)
+            obj = self._process_decoded(d)
+        finally:
+            _DECODED_SHARED.reset(token)
+        if self.drop_metadata:
+            obj, saved = _drop_metadata(obj)
+            self.bytes_saved += saved
+        return obj
+
+    def _process_lazy(self, d):
         if isinstance(d, dict):
-            if "@module" in d and "@class" in d:
-                modname = d["@module"]
-                classname = d["@class"]
-                if cls_redirect := MSONable.REDIRECT.get(modname, {}).get(classname):
-                    classname = cls_redirect["@class"]
-                    modname = cls_redirect["@module"]
-
-            elif "@module" in d and "@callable" in d:
-                modname = d["@module"]
-                objname = d["@callable"]
-                classname = None
-                if d.get("@bound", None) is not None:
-                    # if the function is bound to an instance or class, first
-                    # deserialize the bound object and then remove the object name
-                    # from the function name.
-                    obj = self.process_decoded(d["@bound"])
-                    objname = objname.split(".")[1:]
-                else:
-                    # if the function is not bound to an object, import the
-                    # function from the module name
-                    obj = __import__(modname, globals(), locals(), [objname], 0)
-                    objname = objname.split(".")
-                try:
-                    # the function could be nested. e.g., MyClass.NestedClass.function
-                    # so iteratively access the nesting
-                    for attr in objname:
-                        obj = getattr(obj, attr)
+            if "@module" in d and ("@class" in d or "@callable" in d):
+                return self._process_decoded(d)
+            if "@ref" in d and len(d) == 1:
+                obj = self._process_ref(d["@ref"])
+                if obj is not _UNDECODED:
+                    return obj
+            lazy: LazyDecodedDict | LazyDecodedList = LazyDecodedDict(d, self)
+        elif isinstance(d, list):
+            lazy = LazyDecodedList(d, self)
+        else:
+            return d
+        lazy._shared = _DECODED_SHARED.get()
+        return lazy
+
+    def _process_pending(self, d, shared: _SharedObjects | None):
+        # Decode a value of a lazy container, created while decoding the
+        # document of shared
+        if shared is None:
+            return self.process_decoded(d)
+        token = _DECODED_SHARED.set(shared)
+        try:
+            return self._process_lazy(d)
+        finally:
+            _DECODED_SHARED.reset(token)
 
+    def _process_decoded(self, d):
+        if isinstance(d, dict):
+            if "@module" in d and ("@class" in d or "@callable" in d):
+                obj = self._process_tagged(d)
+                if obj is not _UNDECODED:
+                    return obj
+            elif "@ref" in d and len(d) == 1:
+                obj = self._process_ref(d["@ref"])
+                if obj is not _UNDECODED:
                     return obj
+        elif not isinstance(d, list):
+            return d
 
-                except AttributeError:
-                    pass
+        # Each frame holds a container, an enumeration of its values, the
+        # decoded values (None as long as they are identical to the original
+        # ones) and the index of the container in its parent.
+        stack: list[list] = [
+            [d, enumerate(d.values() if isinstance(d, dict) else d), None, 0]
+        ]
+        while True:
+            frame = stack[-1]
+            container, values, decoded, _ = frame
+            for i, v in values:
+                if isinstance(v, dict):
+                    if "@module" in v and ("@class" in v or "@callable" in v):
+                        obj = self._process_tagged(v)
+                        if obj is not _UNDECODED:
+                            if decoded is None:
+                                decoded = frame[2] = _copy_prefix(container, i)
+                            decoded.append(obj)
+                            continue
+                    elif "@ref" in v and len(v) == 1:
+                        obj = self._process_ref(v["@ref"])
+                        if obj is not _UNDECODED:
+                            if decoded is None:
+                                decoded = frame[2] = _copy_prefix(container, i)
+                            decoded.append(obj)
+                            continue
+                    stack.append([v, enumerate(v.values()), None, i])
+                    break
+                if isinstance(v, list):
+                    stack.append([v, enumerate(v), None, i])
+                    break
+                if decoded is not None:
+                    decoded.append(v)
             else:
-                modname = None
-                classname = None
-
-            if classname:
-                if modname and modname not in {
-                    "bson.objectid",
-                    "numpy",
-                    "pandas",
-                    "pint",
-                    "torch",
-                }:
-                    if modname == "datetime" and classname == "datetime":
-                        try:
-                            # Remove timezone info in the form of "+xx:00"
-                            dt = datetime.datetime.strptime(
-                                d["string"].split("+")[0], "%Y-%m-%d %H:%M:%S.%f"
-                            )
-                        except ValueError:
-                            dt = datetime.datetime.strptime(
-                                d["string"].split("+")[0], "%Y-%m-%d %H:%M:%S"
-                            )
-                        return dt
-
-                    elif modname == "uuid" and classname == "UUID":
-                        return UUID(d["string"])
-
-                    elif modname == "pathlib" and classname == "Path":
-                        return Path(d["string"])
-
-                    mod = __import__(modname, globals(), locals(), [classname], 0)
-                    if hasattr(mod, classname):
-                        cls_ = getattr(mod, classname)
-                        data = {k: v for k, v in d.items() if not k.startswith("@")}
-                        if hasattr(cls_, "from_dict"):
-                            return cls_.from_dict(data)
-                        if issubclass(cls_, Enum):
-                            return cls_(d["value"])
-
-                        try:
-                            import pydantic
-
-                            if issubclass(cls_, pydantic.BaseModel):
-                                d = {
-                                    k: self.process_decoded(v) for k, v in data.items()
-                                }
-                                return cls_(**d)
-                        except ImportError:
-                            pass
-
-                        if (
-                            dataclasses is not None
-                            and (not issubclass(cls_, MSONable))
-                            and dataclasses.is_dataclass(cls_)
-                        ):
-                            d = {k: self.process_decoded(v) for k, v in data.items()}
-                            return cls_(**d)
-
-                elif modname == "torch" and classname == "Tensor":
-                    try:
-                        import torch  # import torch is very expensive
-
-                        if "Complex" in d["dtype"]:
-                            if "size" in d and d["data"] == [[], []]:
-                                return torch.empty(d["size"]).type(d["dtype"])
-
-                            return torch.tensor(
-                                [
-                                    np.array(r) + np.array(i) * 1j
-                                    for r, i in zip(*d["data"])
-                                ],
-                            ).type(d["dtype"])
-
-                        else:
-                            if "size" in d and d["data"] == []:
-                                return torch.empty(d["size"]).type(d["dtype"])
-
-                            return torch.tensor(d["data"]).type(d["dtype"])
-
-                    except ImportError:
-                        pass
-
-                elif modname == "numpy" and classname == "array":
-                    if d["dtype"].startswith("complex"):
-                        return np.array(
-                            [
-                                np.array(r) + np.array(i) * 1j
-                                for r, i in zip(*d["data"])
-                            ],
-                            dtype=d["dtype"],
-                        )
-                    return np.array(d["data"], dtype=d["dtype"])
-
-                elif modname == "pandas":
-                    import pandas as pd
-
-                    if classname == "DataFrame":
-                        decoded_data = MontyDecoder().decode(d["data"])
-                        return pd.DataFrame(decoded_data)
-                    if classname == "Series":
-                        decoded_data = MontyDecoder().decode(d["data"])
-                        return pd.Series(decoded_data)
-
-                elif modname == "pint":
-                    from pint import UnitRegistry
-
-                    ureg = UnitRegistry()
-
-                    if classname == "Quantity":
-                        return ureg.Quantity(d["data"])
-
-                elif (
-                    (bson is not None)
-                    and modname == "bson.objectid"
-                    and classname == "ObjectId"
-                ):
-                    return bson.objectid.ObjectId(d["oid"])
+                stack.pop()
+                if decoded is None:
+                    result = container
+                elif isinstance(container, dict):
+                    result = dict(zip(container, decoded))
+                else:
+                    result = decoded
+                if not stack:
+                    return result
 
-            return {
-                self.process_decoded(k): self.process_decoded(v) for k, v in d.items()
-            }
+                parent = stack[-1]
+                if parent[2] is None and result is not container:
+                    parent[2] = _copy_prefix(parent[0], frame[3])
+                if parent[2] is not None:
+                    parent[2].append(result)
 
-        if isinstance(d, list):
-            return [self.process_decoded(x) for x in d]
+    def _process_tagged(self, d):
+        """
+        Decode a dict with "@module" and "@class" or "@callable" keys.
+        Returns _UNDECODED if the dict does not describe a supported object,
+        in which case it should be treated as a plain dict.
+        """
+        if type(d.get("@id")) is int:
+            return self._process_shared(d)
+        if "@class" in d:
+            modname = d["@module"]
+            classname = d["@class"]
+            if cls_redirect := MSONable.REDIRECT.get(modname, {}).get(classname):
+                classname = cls_redirect["@class"]
+                modname = cls_redirect["@module"]
 
-        return d
+        else:
+            modname = d["@module"]
+            objname = d["@callable"]
+            classname = None
+            if d.get("@bound", None) is not None:
+                # if the function is bound to an instance or class, first
+                # deserialize the bound object and then remove the object name
+                # from the function name.
+                obj = self._process_decoded(d["@bound"])
+                objname = objname.split(".")[1:]
+            else:
+                # if the function is not bound to an object, import the
+                # function from the module name
+                obj = __import__(modname, globals(), locals(), [objname], 0)
+                objname = objname.split(".")
+            try:
+                # the function could be nested. e.g., MyClass.NestedClass.function
+                # so iteratively access the nesting
+                for attr in objname:
+                    obj = getattr(obj, attr)
+
+                return obj
+
+            except AttributeError:
+                pass
+
+        if classname:
+            decode = _DECODERS.get((modname, classname))
+            if decode is not None:
+                return decode(self, d)
+
+            if modname:
+                cls_ = _resolve_class(modname, classname)
+                if cls_ is not None:
+                    data = {k: v for k, v in d.items() if not k.startswith("@")}
+                    if hasattr(cls_, "from_dict"):
+                        return cls_.from_dict(data)
+                    if issubclass(cls_, Enum):
+                        return cls_(d["value"])
+
+                    pydantic = _import_optional("pydantic")
+                    if pydantic is not None and issubclass(cls_, pydantic.BaseModel):
+                        d = {k: self._process_decoded(v) for k, v in data.items()}
+                        return cls_(**d)
+
+                    if (
+                        dataclasses is not None
+                        and (not issubclass(cls_, MSONable))
+                        and dataclasses.is_dataclass(cls_)
+                    ):
+                        d = {k: self._process_decoded(v) for k, v in data.items()}
+                        return cls_(**d)
+
+        return _UNDECODED
+
+    def _process_shared(self, d):
+        objects = _DECODED_SHARED.get().objects
+        ref = d["@id"]
+        if ref not in objects:
+            objects[ref] = _UNDECODED
+            obj = self._process_tagged({k: v for k, v in d.items() if k != "@id"})
+            objects[ref] = d if obj is _UNDECODED else obj
+        obj = objects[ref]
+        # A dict that cannot be decoded is kept as a plain dict
+        return _UNDECODED if obj is d else obj
+
+    def _process_ref(self, ref):
+        """
+        Returns the object referenced by {"@ref": ref}, decoding it if
+        needed, or _UNDECODED if the document has no such "@id".
+        """
+        if type(ref) is not int:
+            return _UNDECODED
+        shared = _DECODED_SHARED.get()
+        if ref not in shared.objects:
+            raw = shared.find(ref)
+            if raw is None:
+                return _UNDECODED
+            self._process_shared(raw)
+        obj = shared.objects[ref]
+        if obj is _UNDECODED:
+            raise MSONError(f"Cannot decode a reference cycle: @ref {ref}")
+        return obj
 
     def decode(self, s):
         """
@@ -892,27 +2563,179 @@ class MontyDecoder(json.JSONDecoder):
         :param s: string
         :return: Object.
         """
-        if bson is not None:
+        parser = self.parser
+        if parser != "orjson" and isinstance(s, (bytes, bytearray)):
+            s = s.decode(json.detect_encoding(s), "surrogatepass")
+        if parser == "auto":
+            # Only import bson for strings that may contain extended json
+            use_bson = '"$' in s and _import_optional("bson.json_util") is not None
+            parser = "bson" if use_bson else "json"
+
+        if parser == "bson":
+            json_util = _import_optional("bson.json_util")
             # need to pass `json_options` to ensure that datetimes are not
             # converted by BSON
             d = json_util.loads(s, json_options=json_util.JSONOptions(tz_aware=True))
+        elif parser == "orjson":
+            d = _import_optional("orjson").loads(s)
         else:
-            d = json.loads(s)
+            d = super().decode(s)
         return self.process_decoded(d)
 
 
+class _Pending:
+    """A raw dict or list held by a lazy container until it is accessed."""
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw) -> None:
+        self.raw = raw
+
+
+def _wrap_pending(value):
+    return _Pending(value) if isinstance(value, (dict, list)) else value
+
+
+def _unwrap_pending(value):
+    return value.raw if isinstance(value, _Pending) else value
+
+
+class LazyDecodedDict(MutableMapping):
+    """
+    A dict returned by MontyDecoder(lazy=True) whose values are decoded
+    when first accessed. MSONable and other tagged objects are decoded as a
+    whole, while nested dicts and lists are themselves lazy. Decoded values
+    replace the raw ones, so each value is decoded at most once.
+    """
+
+    def __init__(self, data: dict, decoder: MontyDecoder | None = None) -> None:
+        """
+        Args:
+            data (dict): Raw dict as parsed from json.
+            decoder (MontyDecoder): Decoder used for the values. Defaults to
+                a lazy MontyDecoder.
+        """
+        self._data = {k: _wrap_pending(v) for k, v in data.items()}
+        self._decoder = decoder or MontyDecoder(lazy=True)
+        self._shared: _SharedObjects | None = None
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        if isinstance(value, _Pending):
+            value = self._decoder._process_pending(value.raw, self._shared)
+            self._data[key] = value
+        return value
+
+    def __setitem__(self, key, value) -> None:
+        self._data[key] = value
+
+    def __delitem__(self, key) -> None:
+        del self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_raw()!r})"
+
+    def to_raw(self) -> dict:
+        """
+        Returns:
+            dict: The dict, with values not accessed yet in their raw form.
+        """
+        return {k: _unwrap_pending(v) for k, v in self._data.items()}
+
+
+class LazyDecodedList(MutableSequence):
+    """
+    A list returned by MontyDecoder(lazy=True) whose items are decoded when
+    first accessed. See LazyDecodedDict.
+    """
+
+    def __init__(self, data: list, decoder: MontyDecoder | None = None) -> None:
+        """
+        Args:
+            data (list): Raw list as parsed from json.
+            decoder (MontyDecoder): Decoder used for the items. Defaults to
+                a lazy MontyDecoder.
+        """
+        self._data = [_wrap_pending(v) for v in data]
+        self._decoder = decoder or MontyDecoder(lazy=True)
+        self._shared: _SharedObjects | None = None
+
+    def _get(self, index: int):
+        value = self._data[index]
+        if isinstance(value, _Pending):
+            value = self._decoder._process_pending(value.raw, self._shared)
+            self._data[index] = value
+        return value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(len(self._data))[index]]
+        return self._get(index)
+
+    def __setitem__(self, index, value) -> None:
+        self._data[index] = value
+
+    def __delitem__(self, index) -> None:
+        del self._data[index]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def insert(self, index: int, value) -> None:
+        """Insert value before index."""
+        self._data.insert(index, value)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (list, LazyDecodedList)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_raw()!r})"
+
+    def to_raw(self) -> list:
+        """
+        Returns:
+            list: The list, with items not accessed yet in their raw form.
+        """
+        return [_unwrap_pending(v) for v in self._data]
+
+
+def _encode_lazy(encoder: MontyEncoder, o: LazyDecodedDict | LazyDecodedList):
+    return o.to_raw()
+
+
+register_encoder(LazyDecodedDict, _encode_lazy)
+register_encoder(LazyDecodedList, _encode_lazy)
+
+
 class MSONError(Exception):
     """
     Exception class for serialization errors.
     """
 
 
+# Exact types that jsanitize returns unchanged whatever its options, which
+# allows skipping the recursive call for them.
+_JSON_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
 def jsanitize(
     obj,
     strict=False,
     allow_bson=False,
     enum_values=False,
     recursive_msonable=False,
+    float_precision=None,
 ):
     """
     This method cleans an input json-like object, either a list or a dict or
@@ -936,10 +2759,22 @@ def jsanitize(
         enum_values (bool): Convert Enums to their values.
         recursive_msonable (bool): If True, uses .as_dict() for MSONables regardless
             of the value of strict.
+        float_precision (int | None): If set, floats are rounded to this many
+            significant digits, as with MontyEncoder's float_precision.
 
     Returns:
         Sanitized dict that can be json serialized.
     """
+    if float_precision is not None:
+        sanitized = jsanitize(
+            obj,
+            strict=strict,
+            allow_bson=allow_bson,
+            enum_values=enum_values,
+            recursive_msonable=recursive_msonable,
+        )
+        return _round_floats(sanitized, float_precision)
+
     if isinstance(obj, Enum):
         if enum_values:
             return obj.value
@@ -947,15 +2782,21 @@ def jsanitize(
             return obj.as_dict()
         return MontyEncoder().default(obj)
 
+    objectid = sys.modules.get("bson.objectid")
     if allow_bson and (
         isinstance(obj, (datetime.datetime, bytes))
-        or (bson is not None and isinstance(obj, bson.objectid.ObjectId))
+        or (objectid is not None and isinstance(obj, objectid.ObjectId))
     ):
         return obj
 
+    if isinstance(obj, (LazyDecodedDict, LazyDecodedList)):
+        obj = obj.to_raw()
+
     if isinstance(obj, (list, tuple)):
         return [
-            jsanitize(
+            i
+            if type(i) in _JSON_SCALAR_TYPES
+            else jsanitize(
                 i,
                 strict=strict,
                 allow_bson=allow_bson,
@@ -965,10 +2806,16 @@ def jsanitize(
             for i in obj
         ]
 
-    if isinstance(obj, np.ndarray):
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(obj, np.ndarray):
+        if obj.dtype.kind in "biuf":
+            # tolist already converts to Python bools, ints and floats
+            return obj.tolist()
         try:
             return [
-                jsanitize(
+                i
+                if type(i) in _JSON_SCALAR_TYPES
+                else jsanitize(
                     i,
                     strict=strict,
                     allow_bson=allow_bson,
@@ -980,7 +2827,7 @@ def jsanitize(
         except TypeError:
             return obj.tolist()
 
-    if isinstance(obj, np.generic):
+    if np is not None and isinstance(obj, np.generic):
         return obj.item()
 
     if _check_type(
@@ -995,7 +2842,9 @@ def jsanitize(
 
     if isinstance(obj, dict):
         return {
-            str(k): jsanitize(
+            str(k): v
+            if type(v) in _JSON_SCALAR_TYPES
+            else jsanitize(
                 v,
                 strict=strict,
                 allow_bson=allow_bson,
@@ -7,28 +7,231 @@ from __future__ import annotations
 
 import json
 import os
+import re
+from collections import deque
+from itertools import islice
 from typing import TYPE_CHECKING, TextIO, cast
 
-from ruamel.yaml import YAML
-
 from monty.io import zopen
-from monty.json import MontyDecoder, MontyEncoder
+from monty.json import (
+    MontyDecoder,
+    MontyEncoder,
+    _import_optional,
+    _write_json,
+    orjson_dumps,
+)
 from monty.msgpack import default, object_hook
 
-try:
-    import msgpack
-except ImportError:
-    msgpack = None
-
 if TYPE_CHECKING:
     from pathlib import Path
-    from typing import Any, Literal, TextIO, Union
+    from typing import IO, Any, Iterator, Literal, Sequence, TextIO, Union
+
+# ruamel.yaml, msgpack and orjson are imported when first needed. They are
+# still available as attributes of this module for backwards compatibility.
+_LAZY_MODULES = {"msgpack": "msgpack", "orjson": "orjson"}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_MODULES:
+        return _import_optional(_LAZY_MODULES[name])
+    if name == "YAML":
+        return _get_yaml()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _get_yaml() -> Any:
+    yaml = _import_optional("ruamel.yaml")
+    return None if yaml is None else yaml.YAML
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING_SPECIAL = re.compile(r'["\\]')
+# Text up to the next bracket outside of strings, or up to a string running
+# past the end of the buffer. This always matches, in linear time.
+_TO_BRACKET = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*')
+_SCALAR_END = re.compile(r"[,\]}\s]")
+
+
+class _JSONStreamReader:
+    """
+    Pull reader walking a JSON document in a text stream without
+    materializing it. Values are only parsed when requested with read_value.
+    Skipped values are scanned and discarded chunk by chunk, so memory use is
+    bounded by the chunk size and the largest value actually read.
+    """
+
+    def __init__(self, fp: IO[str], chunk_size: int = 2**16) -> None:
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        # Start of the value being read, which must be kept in the buffer
+        self._mark: int | None = None
+        self._decoder = json.JSONDecoder()
+
+    def _read(self) -> bool:
+        """Read the next chunk, dropping consumed text. Returns False at EOF."""
+        chunk = self._fp.read(self._chunk_size)
+        keep = min(self._pos if self._mark is None else self._mark, len(self._buf))
+        self._buf = self._buf[keep:] + chunk
+        self._pos -= keep
+        if self._mark is not None:
+            self._mark -= keep
+        return bool(chunk)
+
+    def _error(self, msg: str) -> ValueError:
+        return ValueError(
+            f"{msg} in JSON stream near {self._buf[self._pos : self._pos + 20]!r}"
+        )
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or "" at the end."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()  # type: ignore[union-attr]
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._read():
+                return ""
+
+    def consume(self, char: str) -> None:
+        """Consume the next non-whitespace character, which must be char."""
+        if self.peek() != char:
+            raise self._error(f"Expected {char!r}")
+        self._pos += 1
+
+    def _skip_string(self) -> None:
+        self._pos += 1
+        while True:
+            match = _STRING_SPECIAL.search(self._buf, self._pos)
+            if match is None:
+                self._pos = max(self._pos, len(self._buf))
+                if not self._read():
+                    raise self._error("Unterminated string")
+            elif match.group() == '"':
+                self._pos = match.end()
+                return
+            else:
+                # Skip the escaped character, which may be in the next chunk
+                self._pos = match.end() + 1
+
+    def skip(self) -> None:
+        """Skip the next value without parsing it."""
+        char = self.peek()
+        if char == '"':
+            self._skip_string()
+        elif char in ("[", "{"):
+            self._pos += 1
+            depth = 1
+            while True:
+                # Skip the text and complete strings up to the next bracket
+                self._pos = _TO_BRACKET.match(self._buf, self._pos).end()  # type: ignore[union-attr]
+                if self._pos == len(self._buf):
+                    if not self._read():
+                        raise self._error("Unexpected end")
+                    continue
+                char = self._buf[self._pos]
+                if char == '"':
+                    # A string running past the end of the buffer
+                    self._skip_string()
+                    continue
+                self._pos += 1
+                depth += 1 if char in "[{" else -1
+                if depth == 0:
+                    return
+        elif char == "":
+            raise self._error("Unexpected end")
+        else:
+            while (match := _SCALAR_END.search(self._buf, self._pos)) is None:
+                self._pos = len(self._buf)
+                if not self._read():
+                    return
+            self._pos = match.start()
+
+    def read_value(self) -> Any:
+        """Parse and return the next value."""
+        self.peek()
+        self._mark = self._pos
+        try:
+            self.skip()
+            value, _ = self._decoder.raw_decode(self._buf, self._mark)
+        finally:
+            self._mark = None
+        return value
+
+    def seek(self, path: Sequence[str]) -> None:
+        """
+        Advance to the value at path, a sequence of object keys or array
+        indices, skipping all values before it.
+        """
+        for key in path:
+            char = self.peek()
+            self._pos += 1
+            if char == "{":
+                while self.peek() != "}":
+                    found = self.read_value() == key
+                    self.consume(":")
+                    if found:
+                        break
+                    self.skip()
+                    if self.peek() == ",":
+                        self._pos += 1
+                else:
+                    raise KeyError(key)
+            elif char == "[" and key.isdigit():
+                for _ in range(int(key)):
+                    if self.peek() == "]":
+                        raise IndexError(key)
+                    self.skip()
+                    if self.peek() == ",":
+                        self._pos += 1
+                if self.peek() == "]":
+                    raise IndexError(key)
+            else:
+                raise KeyError(key)
+
+    def iter_array(self) -> Iterator[Any]:
+        """Parse and yield the elements of the next value, which must be an array."""
+        self.consume("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.read_value()
+            char = self.peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise self._error("Expected ',' or ']'")
+
+
+def _split_path(path: str | Sequence[str] | None) -> list[str]:
+    if path is None:
+        return []
+    if isinstance(path, str):
+        return path.split(".") if path else []
+    return [str(key) for key in path]
+
+
+def _detect_format(fn: Union[str, Path]) -> Literal["json", "jsonl", "yaml", "mpk"]:
+    basename = os.path.basename(fn).lower()
+    if ".mpk" in basename:
+        return "mpk"
+    if any(ext in basename for ext in (".yaml", ".yml")):
+        return "yaml"
+    # Checked before json, which is the default
+    if ".jsonl" in basename:
+        return "jsonl"
+    return "json"
 
 
 def loadfn(
     fn: Union[str, Path],
     *args,
-    fmt: Literal["json", "yaml", "mpk"] | None = None,
+    fmt: Literal["json", "jsonl", "yaml", "mpk"] | None = None,
+    engine: Literal["json", "orjson"] = "json",
+    lazy: bool = False,
+    select: str | Sequence[str] | None = None,
     **kwargs,
 ) -> Any:
     """
@@ -39,40 +242,85 @@ def loadfn(
     detected from the file extension (case insensitive).
     YAML is assumed if the filename contains ".yaml" or ".yml".
     Msgpack is assumed if the filename contains ".mpk".
+    JSON Lines is assumed if the filename contains ".jsonl", in which case
+    a list of the objects on each line is returned (see iterloadfn).
     JSON is otherwise assumed.
 
     Args:
         fn (str/Path): filename or pathlib.Path.
         *args: Any of the args supported by json/yaml.load.
-        fmt ("json" | "yaml" | "mpk"): If specified, the fmt specified would
-            be used instead of autodetection from filename.
-        **kwargs: Any of the kwargs supported by json/yaml.load.
+        fmt ("json" | "jsonl" | "yaml" | "mpk"): If specified, the fmt
+            specified would be used instead of autodetection from filename.
+        engine ("json" | "orjson"): Library used to parse json files. With
+            "orjson", kwargs are passed to the decoder class (cls) instead.
+            Note that orjson does not accept NaN or Infinity.
+        lazy (bool): If True, dicts and lists in json and msgpack files are
+            returned as LazyDecodedDict and LazyDecodedList, which only
+            decode the MSONable objects they contain when these are
+            accessed. See MontyDecoder.
+        select (str | Sequence[str] | None): Path to a single value to
+            load from a json or msgpack file, given as dot-separated object
+            keys or array indices as in iterloadfn, e.g. "output.energy".
+            The file is read as a stream up to the end of that value, the
+            values before it are skipped without being parsed and only the
+            selected value is decoded. Raises a KeyError or an IndexError
+            if the path does not exist. kwargs are then passed to the
+            decoder class (cls) for json files and to msgpack.Unpacker for
+            msgpack files.
+        **kwargs: Any of the kwargs supported by json/yaml.load. For json,
+            these include the options of MontyDecoder, e.g. parser. For json
+            lines, these are passed to iterloadfn, e.g. processes.
 
     Returns:
         object: Result of json/yaml/msgpack.load.
     """
 
+    if engine not in ("json", "orjson"):
+        raise ValueError(f"Invalid engine: {engine}")
+
     if fmt is None:
-        basename = os.path.basename(fn).lower()
-        if ".mpk" in basename:
-            fmt = "mpk"
-        elif any(ext in basename for ext in (".yaml", ".yml")):
-            fmt = "yaml"
-        else:
-            fmt = "json"
+        fmt = _detect_format(fn)
+
+    if select is not None:
+        return _load_selected(fn, fmt, _split_path(select), lazy, *args, **kwargs)
+
+    if fmt == "jsonl":
+        if args:
+            raise TypeError("Positional arguments are not supported for jsonl files.")
+        if lazy:
+            kwargs["lazy"] = True
+        return list(iterloadfn(fn, fmt="jsonl", engine=engine, **kwargs))
+
+    if lazy and fmt not in ("json", "mpk"):
+        raise ValueError(f"Lazy loading is not supported for {fmt} files.")
 
     if fmt == "mpk":
+        msgpack = _import_optional("msgpack")
         if msgpack is None:
             raise RuntimeError(
                 "Loading of message pack files is not possible as msgpack-python is not installed."
             )
+        if lazy:
+            with zopen(fn, mode="rb") as fp:
+                data = msgpack.load(fp, *args, **kwargs)  # pylint: disable=E1101
+            return MontyDecoder(lazy=True).process_decoded(data)
         if "object_hook" not in kwargs:
             kwargs["object_hook"] = object_hook
         with zopen(fn, mode="rb") as fp:
             return msgpack.load(fp, *args, **kwargs)  # pylint: disable=E1101
+    elif fmt == "json" and engine == "orjson":
+        orjson = _import_optional("orjson")
+        if orjson is None:
+            raise RuntimeError("orjson must be installed to use the orjson engine.")
+        if lazy:
+            kwargs["lazy"] = True
+        decoder = kwargs.pop("cls", MontyDecoder)(*args, **kwargs)
+        with zopen(fn, mode="rb") as fp:
+            return decoder.process_decoded(orjson.loads(fp.read()))
     else:
         with zopen(fn, mode="rt", encoding="utf-8") as fp:
             if fmt == "yaml":
+                YAML = _get_yaml()
                 if YAML is None:
                     raise RuntimeError("Loading of YAML files requires ruamel.yaml.")
                 yaml = YAML()
@@ -80,16 +328,79 @@ def loadfn(
             if fmt == "json":
                 if "cls" not in kwargs:
                     kwargs["cls"] = MontyDecoder
+                if lazy:
+                    kwargs["lazy"] = True
                 return json.load(fp, *args, **kwargs)
 
             raise TypeError(f"Invalid format: {fmt}")
 
 
+def _load_selected(
+    fn: Union[str, Path],
+    fmt: str,
+    path: list[str],
+    lazy: bool,
+    *args,
+    **kwargs,
+) -> Any:
+    """Load and decode the value at path in a json or msgpack file."""
+    if fmt == "mpk":
+        msgpack = _import_optional("msgpack")
+        if msgpack is None:
+            raise RuntimeError(
+                "Loading of message pack files is not possible as msgpack-python is not installed."
+            )
+        with zopen(fn, mode="rb") as fp:
+            unpacker = msgpack.Unpacker(fp, *args, **kwargs)
+            _seek_msgpack(unpacker, path)
+            value = unpacker.unpack()
+        return MontyDecoder(lazy=lazy).process_decoded(value)
+
+    if fmt != "json":
+        raise ValueError(f"Selecting a path is not supported for {fmt} files.")
+    decoder = kwargs.pop("cls", MontyDecoder)(*args, lazy=lazy, **kwargs)
+    with zopen(fn, mode="rt", encoding="utf-8") as fp:
+        reader = _JSONStreamReader(cast(TextIO, fp))
+        reader.seek(path)
+        value = reader.read_value()
+    return decoder.process_decoded(value)
+
+
+def _seek_msgpack(unpacker: Any, path: Sequence[str]) -> None:
+    """
+    Advance a msgpack.Unpacker to the value at path, a sequence of map keys
+    or array indices, skipping all values before it.
+    """
+    for key in path:
+        try:
+            n_items = unpacker.read_map_header()
+        except ValueError:
+            # Not a map. Reading the header does not consume anything then.
+            try:
+                n_items = unpacker.read_array_header()
+            except ValueError:
+                raise KeyError(key) from None
+            if not key.isdigit() or int(key) >= n_items:
+                raise IndexError(key) from None
+            for _ in range(int(key)):
+                unpacker.skip()
+            continue
+
+        for _ in range(n_items):
+            # Keys may be ints in msgpack
+            if str(unpacker.unpack()) == key:
+                break
+            unpacker.skip()
+        else:
+            raise KeyError(key)
+
+
 def dumpfn(
     obj: object,
     fn: Union[str, Path],
     *args,
-    fmt: Literal["json", "yaml", "mpk"] | None = None,
+    fmt: Literal["json", "jsonl", "yaml", "mpk"] | None = None,
+    engine: Literal["json", "orjson"] = "json",
     **kwargs,
 ) -> None:
     """
@@ -100,29 +411,34 @@ def dumpfn(
     detected from the file extension (case insensitive). YAML is assumed if the
     filename contains ".yaml" or ".yml".
     Msgpack is assumed if the filename contains ".mpk".
+    JSON Lines is assumed if the filename contains ".jsonl", in which case
+    obj must be an iterable and each of its items is written on one line.
     JSON is otherwise assumed.
 
     Args:
         obj (object): Object to dump.
         fn (str/Path): filename or pathlib.Path.
-        fmt ("json" | "yaml" | "mpk"): If specified, the fmt specified would
-            be used instead of autodetection from filename.
+        fmt ("json" | "jsonl" | "yaml" | "mpk"): If specified, the fmt
+            specified would be used instead of autodetection from filename.
+        engine ("json" | "orjson"): Library used to write json files. The
+            "orjson" engine is several times faster; see
+            monty.json.orjson_dumps for the supported kwargs and the few
+            differences in output.
         *args: Any of the args supported by json/yaml.dump.
-        **kwargs: Any of the kwargs supported by json/yaml.dump.
+        **kwargs: Any of the kwargs supported by json/yaml.dump. For json,
+            these include the options of MontyEncoder, e.g. float_precision.
 
     Returns:
         (object) Result of json.load.
     """
+    if engine not in ("json", "orjson"):
+        raise ValueError(f"Invalid engine: {engine}")
+
     if fmt is None:
-        basename = os.path.basename(fn).lower()
-        if ".mpk" in basename:
-            fmt = "mpk"
-        elif any(ext in basename for ext in (".yaml", ".yml")):
-            fmt = "yaml"
-        else:
-            fmt = "json"
+        fmt = _detect_format(fn)
 
     if fmt == "mpk":
+        msgpack = _import_optional("msgpack")
         if msgpack is None:
             raise RuntimeError(
                 "Loading of message pack files is not possible as msgpack-python is not installed."
@@ -131,18 +447,169 @@ def dumpfn(
             kwargs["default"] = default
         with zopen(fn, mode="wb") as fp:
             msgpack.dump(obj, fp, *args, **kwargs)  # pylint: disable=E1101
+    elif fmt == "json" and engine == "orjson":
+        with zopen(fn, mode="wb") as fp:
+            fp.write(orjson_dumps(obj, *args, **kwargs))
+    elif fmt == "jsonl":
+        if kwargs.get("indent") is not None:
+            raise ValueError("indent is not supported for jsonl files.")
+        if engine == "orjson":
+            with zopen(fn, mode="wb") as fp:
+                for item in obj:  # type: ignore[attr-defined]
+                    fp.write(orjson_dumps(item, *args, **kwargs) + b"\n")
+        else:
+            encoder = kwargs.pop("cls", MontyEncoder)(*args, **kwargs)
+            with zopen(fn, mode="wt", encoding="utf-8") as fp:
+                for item in obj:  # type: ignore[attr-defined]
+                    fp.write(encoder.encode(item) + "\n")
     else:
         with zopen(fn, mode="wt", encoding="utf-8") as fp:
             fp = cast(TextIO, fp)
 
             if fmt == "yaml":
+                YAML = _get_yaml()
                 if YAML is None:
                     raise RuntimeError("Loading of YAML files requires ruamel.yaml.")
                 yaml = YAML()
                 yaml.dump(obj, fp, *args, **kwargs)
             elif fmt == "json":
-                if "cls" not in kwargs:
-                    kwargs["cls"] = MontyEncoder
-                fp.write(json.dumps(obj, *args, **kwargs))
+                # Write the json incrementally rather than as one big string
+                encoder = kwargs.pop("cls", MontyEncoder)(*args, **kwargs)
+                _write_json(encoder, obj, fp)
             else:
                 raise TypeError(f"Invalid format: {fmt}")
+
+
+def _decode_json_lines(
+    lines: list[str],
+    cls: type[MontyDecoder],
+    engine: Literal["json", "orjson"],
+    kwargs: dict,
+) -> list[Any]:
+    """Parse and decode lines of a json lines file, skipping blank lines."""
+    decoder = cls(**kwargs)
+    if engine == "orjson":
+        import orjson
+
+        return [
+            decoder.process_decoded(orjson.loads(line))
+            for line in lines
+            if line.strip()
+        ]
+    return [decoder.decode(line) for line in lines if line.strip()]
+
+
+def _iter_line_chunks(fp: IO[str], chunk_size: int) -> Iterator[list[str]]:
+    """Yield lists of lines totalling at least chunk_size characters."""
+    lines: list[str] = []
+    size = 0
+    for line in fp:
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield lines
+            lines = []
+            size = 0
+    if lines:
+        yield lines
+
+
+def iterloadfn(
+    fn: Union[str, Path],
+    prefix: str | Sequence[str] | None = None,
+    cls: type[MontyDecoder] = MontyDecoder,
+    chunk_size: int = 2**16,
+    fmt: Literal["json", "jsonl"] | None = None,
+    engine: Literal["json", "orjson"] = "json",
+    processes: int | None = None,
+    **kwargs,
+) -> Iterator[Any]:
+    """
+    Iterate over the elements of a JSON array in a file, or over the lines of
+    a JSON Lines file, decoding one element at a time. Unlike loadfn, the
+    document is never fully read into memory, so memory use is bounded by
+    the chunk size and the largest element. File may also be compressed, as
+    supported by zopen.
+
+    Args:
+        fn (str/Path): filename or pathlib.Path.
+        prefix (str | Sequence[str] | None): Path to the array to iterate
+            over, given as dot-separated object keys or array indices, e.g.
+            "results" or "runs.0.steps". Use a sequence for keys containing
+            dots. The default is the top-level array. Not supported for
+            JSON Lines files.
+        cls (type[MontyDecoder]): Decoder class used to decode each element.
+        chunk_size (int): Number of characters read from the file at once.
+            For JSON Lines files, lines are parsed in chunks of about this
+            many characters.
+        fmt ("json" | "jsonl" | None): Format of the file. By default,
+            JSON Lines is assumed if the filename contains ".jsonl" and JSON
+            otherwise.
+        engine ("json" | "orjson"): Library used to parse JSON Lines files.
+        processes (int | None): If set, chunks of lines of a JSON Lines file
+            are parsed and decoded in parallel by this many worker processes.
+            Elements are still yielded in order. The decoded objects must be
+            picklable, and the arguments of the decoder class as well, so
+            this cannot be combined with lazy decoding.
+        **kwargs: Keyword arguments passed to the decoder class.
+
+    Yields:
+        Decoded elements of the array or lines of the file.
+    """
+    if fmt is None:
+        fmt = "jsonl" if _detect_format(fn) == "jsonl" else "json"
+    if fmt == "jsonl":
+        if prefix is not None:
+            raise ValueError("prefix is not supported for jsonl files.")
+        yield from _iterload_json_lines(fn, cls, chunk_size, engine, processes, kwargs)
+        return
+    if fmt != "json":
+        raise TypeError(f"Invalid format: {fmt}")
+
+    decoder = cls(**kwargs)
+    with zopen(fn, mode="rt", encoding="utf-8") as fp:
+        reader = _JSONStreamReader(fp, chunk_size=chunk_size)
+        reader.seek(_split_path(prefix))
+        for item in reader.iter_array():
+            yield decoder.process_decoded(item)
+
+
+def _iterload_json_lines(
+    fn: Union[str, Path],
+    cls: type[MontyDecoder],
+    chunk_size: int,
+    engine: Literal["json", "orjson"],
+    processes: int | None,
+    kwargs: dict,
+) -> Iterator[Any]:
+    if engine not in ("json", "orjson"):
+        raise ValueError(f"Invalid engine: {engine}")
+    if engine == "orjson" and _import_optional("orjson") is None:
+        raise RuntimeError("orjson must be installed to use the orjson engine.")
+    if processes is not None and kwargs.get("lazy"):
+        # Lazy containers hold their decoder, which cannot be pickled
+        raise ValueError("lazy is not supported with processes.")
+
+    with zopen(fn, mode="rt", encoding="utf-8") as fp:
+        chunks = _iter_line_chunks(cast(TextIO, fp), chunk_size)
+        if processes is None:
+            for lines in chunks:
+                yield from _decode_json_lines(lines, cls, engine, kwargs)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(processes) as executor:
+            # Keep a few chunks per worker in flight, so that the file is
+            # not read ahead of the consumer, and yield them in order
+            pending = deque(
+                executor.submit(_decode_json_lines, lines, cls, engine, kwargs)
+                for lines in islice(chunks, 2 * processes)
+            )
+            while pending:
+                items = pending.popleft().result()
+                for lines in islice(chunks, 1):
+                    pending.append(
+                        executor.submit(_decode_json_lines, lines, cls, engine, kwargs)
+                    )
+                yield from items
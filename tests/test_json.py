@@ -1,27 +1,44 @@
 from __future__ import annotations
 
+import collections
 import dataclasses
 import datetime
 import json
 import os
 import pathlib
-from enum import Enum
+import sys
+from enum import Enum, IntEnum
 from typing import Union
+from uuid import UUID
 
 import numpy as np
 import pytest
 
 from monty.json import (
+    _DECODERS,
+    _ENCODER_DISPATCH,
+    _ENCODERS,
+    LazyDecodedDict,
+    LazyDecodedList,
     MontyDecoder,
     MontyEncoder,
     MSONable,
+    MSONError,
     _check_type,
+    _get_mro_names,
+    _get_serialization_plan,
     _load_redirect,
+    class_cache_info,
+    clear_class_cache,
     jsanitize,
     load,
     load2dict,
+    orjson_dumps,
     partial_monty_encode,
+    register_decoder,
+    register_encoder,
     save,
+    set_unit_registry,
 )
 
 from . import __version__ as TESTS_VERSION
@@ -56,6 +73,11 @@ try:
 except ImportError:
     json_util = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 TEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_files")
 
@@ -80,6 +102,16 @@ class GoodMSONClass(MSONable):
         )
 
 
+class PostProcessedMSONClass(MSONable):
+    def __init__(self, child):
+        self.child = child
+
+    def as_dict(self):
+        d = super().as_dict()
+        d["child"].pop("@version", None)
+        return d
+
+
 class GoodNOTMSONClass:
     """Literally the same as the GoodMSONClass, except it does not have
     the MSONable inheritance!"""
@@ -185,6 +217,15 @@ class EnumTest(MSONable, Enum):
     b = 2
 
 
+class IntEnumTest(IntEnum):
+    a = 1
+
+
+class ClassContainingEnum(MSONable):
+    def __init__(self, e):
+        self.e = e
+
+
 class ClassContainingDataFrame(MSONable):
     def __init__(self, df):
         self.df = df
@@ -224,6 +265,13 @@ class NestedDataClass:
     points: list[Point]
 
 
+@dataclasses.dataclass
+class DataClassWithArray:
+    values: np.ndarray
+    point: Point
+    record: Union[GoodMSONClass, None] = None
+
+
 class TestMSONable:
     def setup_method(self):
         self.good_cls = GoodMSONClass
@@ -324,6 +372,117 @@ class TestMSONable:
             obj.unsafe_hash().hexdigest() == "44204c8da394e878f7562c9aa2e37c2177f28b81"
         )
 
+    def test_canonical_hash(self):
+        GMC = GoodMSONClass
+        obj = GMC(GMC(1, 1.0, "one"), {"x": [1, 2], "y": np.arange(3.0)}, None)
+        h = obj.canonical_hash()
+        assert h.name == "blake2b"
+        assert h.hexdigest() == obj.canonical_hash().hexdigest()
+
+        # Equal contents hash equally, whatever the order of keys
+        same = GMC(GMC(1, 1.0, "one"), {"y": np.arange(3.0), "x": [1, 2]}, None)
+        assert same.canonical_hash().digest() == h.digest()
+        swapped = np.arange(3.0).astype(">f8")
+        same.b["y"] = swapped
+        assert same.canonical_hash().digest() == h.digest()
+
+        for other in (
+            GMC(GMC(1, 1.0, "one"), {"x": [1, 2], "y": np.arange(3)}, None),
+            GMC(GMC(1, 1.0, "one"), {"x": [1, 2.0], "y": np.arange(3.0)}, None),
+            GMC(GMC(1, 1.0, "one"), {"x": [[1], 2], "y": np.arange(3.0)}, None),
+            GMC(GMC(1, 1.0, "one"), {"x": [1, 2], "y": np.arange(3.0)}, "None"),
+            GMC(GMC(1, 1.0, "one", 2), {"x": [1, 2], "y": np.arange(3.0)}, None),
+        ):
+            assert other.canonical_hash().digest() != h.digest()
+
+        # The package version does not change the hash
+        plan = _get_serialization_plan(GMC)
+        version, plan.version = plan.version, "0.0.0"
+        try:
+            assert obj.as_dict()["@version"] == "0.0.0"
+            assert obj.canonical_hash().digest() == h.digest()
+        finally:
+            plan.version = version
+
+        # Memoized hashes are reused for shared sub-objects
+        memo = obj.canonical_hash(memoize=True)
+        assert memo.digest() == h.digest()
+        memo.update(b"not cached")
+        assert obj.canonical_hash(memoize=True).digest() == h.digest()
+        obj.a.a = 2
+        assert obj.canonical_hash(memoize=True).digest() == h.digest()
+        assert obj.canonical_hash().digest() != h.digest()
+
+        cyclic = GMC(1, [], 3)
+        cyclic.b.append(cyclic)
+        with pytest.raises(ValueError, match="Circular"):
+            cyclic.canonical_hash()
+
+        # Nested objects hash like their as_dict, also in overrides of as_dict
+        assert GMC(GMC(1, 2, 3), 0, 0).canonical_hash().digest() == (
+            GMC(GMC(1, 2, 3).as_dict(), 0, 0).canonical_hash().digest()
+        )
+        post = PostProcessedMSONClass(GMC(1, 2, 3))
+        assert post.canonical_hash().digest() == (
+            PostProcessedMSONClass(GMC(1, 2, 3)).canonical_hash().digest()
+        )
+        assert post.canonical_hash().digest() != (
+            PostProcessedMSONClass(GMC(1, 2, 4)).canonical_hash().digest()
+        )
+
+        # Bytes, complex numbers and sets
+        values = GMC(b"\x00\x01", 1 + 2j, {"a", 1, (2, 3)})
+        h = values.canonical_hash()
+        same = GMC(b"\x00\x01", 1 + 2j, {(2, 3), 1, "a"})
+        assert same.canonical_hash().digest() == h.digest()
+        for other in (
+            GMC(b"\x00\x02", 1 + 2j, {"a", 1, (2, 3)}),
+            GMC(b"\x00\x01", 1 - 2j, {"a", 1, (2, 3)}),
+            GMC(b"\x00\x01", 1 + 2j, {"a", 1}),
+        ):
+            assert other.canonical_hash().digest() != h.digest()
+
+    def test_serialization_plan(self):
+        obj = self.good_cls("Hello", "World", "Python")
+        d = obj.as_dict()
+        plan = _get_serialization_plan(self.good_cls)
+        assert plan is _get_serialization_plan(self.good_cls)
+        assert plan.args == ("a", "b", "c", "d")
+        assert plan.varargs == "values"
+        assert plan.version == TESTS_VERSION
+        assert obj.as_dict() == d
+
+        # argname is looked up before _argname on every instance
+        class PrivateMSONClass(MSONable):
+            def __init__(self, x):
+                self._x = x
+
+        assert PrivateMSONClass(1).as_dict()["x"] == 1
+        both = PrivateMSONClass("stale")
+        both.x = 2
+        assert both.as_dict()["x"] == 2
+
+        class DynamicMSONClass(MSONable):
+            CACHE_SERIALIZATION_PLAN = False
+
+            def __init__(self, a):
+                self.a = a
+
+        assert _get_serialization_plan(DynamicMSONClass) is not (
+            _get_serialization_plan(DynamicMSONClass)
+        )
+        obj = DynamicMSONClass(1)
+        assert obj.as_dict()["a"] == 1
+
+        def new_init(self, b):
+            self.b = b
+
+        DynamicMSONClass.__init__ = new_init
+        obj = DynamicMSONClass(2)
+        d = obj.as_dict()
+        assert d["b"] == 2
+        assert "a" not in d
+
     def test_version(self):
         obj = self.good_cls("Hello", "World", "Python")
         d = obj.as_dict()
@@ -480,6 +639,40 @@ class TestMSONable:
         assert test_good_class == test_good_class2
         assert test_good_class == test_good_class3
 
+    def test_save_load_array_sidecar(self, tmp_path):
+        big = np.arange(1000, dtype="float64").reshape(10, 100)
+        small = np.arange(3)
+        obj = GoodMSONClass(big, {"x": [big, small]}, "c")
+
+        target = tmp_path / "test.json"
+        obj.save(target, array_threshold=100)
+
+        array_dir = tmp_path / "test_arrays"
+        assert sorted(os.listdir(array_dir)) == [
+            "000000000000.npy",
+            "000000000001.npy",
+        ]
+        with open(target, encoding="utf-8") as f:
+            d = json.load(f)
+        assert d["a"] == {"@array_reference": "000000000000"}
+        assert d["b"]["x"][1]["data"] == [0, 1, 2]
+
+        with pytest.raises(FileExistsError):
+            obj.save(target, array_threshold=100)
+
+        obj2 = GoodMSONClass.load(target, mmap_mode="r")
+        assert isinstance(obj2.a, np.memmap)
+        assert np.array_equal(obj2.a, big)
+        assert np.array_equal(obj2.b["x"][0], big)
+        assert np.array_equal(obj2.b["x"][1], small)
+
+        d = load2dict(target)
+        assert not isinstance(d["a"], np.memmap)
+        assert np.array_equal(d["a"], big)
+
+        obj3 = load(target, mmap_mode="r")
+        assert np.array_equal(obj3.a, big)
+
 
 class TestJson:
     def test_as_from_dict(self):
@@ -549,6 +742,33 @@ class TestJson:
         assert ct_empty_json_dict["size"] == list(ct_empty.size())
         assert np.array_equal(ct_empty_from_json.numpy(), ct_empty.numpy())
 
+    @pytest.mark.skipif(torch is None, reason="torch not present")
+    @pytest.mark.parametrize("encoding", ["base64", "base64-zlib"])
+    def test_torch_tensor_buffer_encoding(self, encoding):
+        tensors = [
+            torch.arange(12, dtype=torch.float32).reshape(3, 4),
+            torch.tensor([[1 + 2j, 3 - 4j]], dtype=torch.complex64),
+            torch.tensor([True, False]),
+            torch.empty((0, 2), dtype=torch.int16),
+            torch.tensor(2.5, dtype=torch.float64),
+            torch.ones(3, requires_grad=True),
+            torch.tensor([1 + 2j]).conj(),
+        ]
+        s = json.dumps(tensors, cls=MontyEncoder, array_encoding=encoding)
+        assert all(d["encoding"] == encoding for d in json.loads(s))
+        for t, t2 in zip(tensors, json.loads(s, cls=MontyDecoder)):
+            assert isinstance(t2, torch.Tensor)
+            assert t2.dtype == t.dtype
+            assert t2.shape == t.shape
+            assert torch.equal(t2, t.detach().resolve_conj())
+
+        # bfloat16 has no numpy equivalent and falls back to lists
+        t = torch.tensor([1.5, 2.0], dtype=torch.bfloat16)
+        d = json.loads(json.dumps(t, cls=MontyEncoder, array_encoding=encoding))
+        assert d["dtype"] == "torch.BFloat16Tensor"
+        assert "encoding" not in d
+        assert torch.equal(MontyDecoder().process_decoded(d), t)
+
     @pytest.mark.skipif(torch is None, reason="torch not present")
     def test_torch_tensor_backwards_compatibility(self):
         # Simulate an old-style JSON (no "size")
@@ -610,12 +830,49 @@ class TestJson:
 
         created_at_after = MontyDecoder().process_decoded(data)
 
-        assert str(created_at_after).rstrip("0") == str(created_at).rstrip(
-            "+00:00"
-        ).rstrip("0")
+        assert created_at_after == created_at
+        assert created_at_after.utcoffset() == datetime.timedelta(0)
+
+        # Negative offsets and datetimes without microseconds
+        tz = datetime.timezone(datetime.timedelta(hours=-5, minutes=-30))
+        dt = datetime.datetime(2020, 2, 29, 23, 59, 59, tzinfo=tz)
+        decoded = json.loads(json.dumps(dt, cls=MontyEncoder), cls=MontyDecoder)
+        assert decoded == dt
+        assert decoded.utcoffset() == dt.utcoffset()
+
+    @pytest.mark.parametrize(
+        "dt",
+        [
+            datetime.datetime(2021, 3, 4, 5, 6, 7, 891011),
+            datetime.datetime(1900, 1, 1),
+            datetime.datetime(2024, 6, 1, 12, tzinfo=datetime.timezone.utc),
+            datetime.datetime(
+                1969,
+                12,
+                31,
+                23,
+                59,
+                59,
+                999999,
+                tzinfo=datetime.timezone(datetime.timedelta(hours=9)),
+            ),
+        ],
+    )
+    def test_datetime_epoch_encoding(self, dt):
+        d = json.loads(json.dumps(dt, cls=MontyEncoder, datetime_encoding="epoch"))
+        assert isinstance(d["epoch_us"], int)
+        assert "string" not in d
+
+        decoded = MontyDecoder().process_decoded(d)
+        assert decoded == dt
+        assert decoded.utcoffset() == dt.utcoffset()
+        assert decoded.replace(tzinfo=None) == dt.replace(tzinfo=None)
+
+        with pytest.raises(ValueError, match="Invalid datetime_encoding"):
+            json.dumps(dt, cls=MontyEncoder, datetime_encoding="unix")
 
     def test_uuid(self):
-        from uuid import UUID, uuid4
+        from uuid import uuid4
 
         uuid = uuid4()
         jsonstr = json.dumps(uuid, cls=MontyEncoder)
@@ -712,6 +969,48 @@ class TestJson:
         assert isinstance(obj.np_a["a"][0]["b"], np.ndarray)
         assert obj.np_a["a"][0]["b"][0][1] == 2 + 1j
 
+    @pytest.mark.parametrize("encoding", ["base64", "base64-zlib"])
+    def test_numpy_buffer_encoding(self, encoding):
+        arrays = [
+            np.arange(12, dtype="float64").reshape(3, 4),
+            np.arange(12, dtype=">i4").reshape(4, 3)[::2],
+            np.array([1 + 1j, 2 - 3j], dtype="complex64"),
+            np.array([True, False]),
+            np.array(-1.5),
+            np.empty((0, 3)),
+            np.array(["2020-01-01", "2021-06-30"], dtype="datetime64[D]"),
+        ]
+        for x in arrays:
+            djson = json.dumps(x, cls=MontyEncoder, array_encoding=encoding)
+            d = json.loads(djson)
+            assert d["@module"] == "numpy"
+            assert d["@class"] == "array"
+            assert d["encoding"] == encoding
+            assert d["shape"] == list(x.shape)
+            assert isinstance(d["data"], str)
+
+            x2 = json.loads(djson, cls=MontyDecoder)
+            assert isinstance(x2, np.ndarray)
+            assert x2.dtype == x.dtype
+            assert x2.shape == x.shape
+            assert np.array_equal(x2, x)
+            assert x2.flags.writeable
+
+        # Non-numeric arrays fall back to lists
+        x = np.array(["a", "b"])
+        d = json.loads(json.dumps(x, cls=MontyEncoder, array_encoding=encoding))
+        assert d["data"] == ["a", "b"]
+        assert "encoding" not in d
+
+        # Nested in an MSONable object
+        obj = ClassContainingNumpyArray(np_a={"a": [{"b": np.ones((2, 2))}]})
+        djson = json.dumps(obj, cls=MontyEncoder, array_encoding=encoding)
+        obj2 = json.loads(djson, cls=MontyDecoder)
+        assert np.array_equal(obj2.np_a["a"][0]["b"], np.ones((2, 2)))
+
+        with pytest.raises(ValueError, match="Invalid array_encoding"):
+            json.dumps(x, cls=MontyEncoder, array_encoding="hex")
+
     @pytest.mark.skipif(pd is None, reason="pandas not present")
     def test_pandas(self):
         cls = ClassContainingDataFrame(
@@ -754,6 +1053,94 @@ class TestJson:
         assert isinstance(obj.s["df"][0], pd.Series)
         assert list(obj.s["df"][0].a), [1, 2 == 3]
 
+        # Subclasses are decoded as the pandas class they derive from
+        class SubDataFrame(pd.DataFrame):
+            pass
+
+        class SubSeries(pd.Series):
+            pass
+
+        for encoding in ("json", "columnar"):
+            encoded = json.dumps(
+                [SubDataFrame({"a": [1, 2]}), SubSeries([1.0, 2.0])],
+                cls=MontyEncoder,
+                dataframe_encoding=encoding,
+            )
+            df, series = json.loads(encoded, cls=MontyDecoder)
+            assert type(df) is pd.DataFrame
+            assert type(series) is pd.Series
+
+    @pytest.mark.skipif(pd is None, reason="pandas not present")
+    @pytest.mark.parametrize("array_encoding", ["list", "base64-zlib"])
+    def test_pandas_columnar(self, array_encoding):
+        df = pd.DataFrame(
+            {
+                "f": [1.5, 2.5, np.nan],
+                "i": [1, 2, 3],
+                "s": ["a", None, "c"],
+                "b": [True, False, True],
+                "t": pd.to_datetime(["2020-01-01", "2021-01-01", None]),
+                "cat": pd.Categorical(["x", "y", "x"]),
+                "I": pd.array([1, None, 3], dtype="Int64"),
+                "o": [[1], {"a": 1}, datetime.datetime(2020, 1, 1)],
+            },
+            index=pd.Index(["r1", "r2", "r3"], name="row"),
+        )
+        df.columns.name = "cols"
+        cls = ClassContainingDataFrame(df=df)
+        encoded = json.dumps(
+            cls,
+            cls=MontyEncoder,
+            dataframe_encoding="columnar",
+            array_encoding=array_encoding,
+        )
+        d = json.loads(encoded)["df"]
+        assert d["encoding"] == "columnar"
+        assert isinstance(d["data"], list)
+        assert d["data"][0]["dtype"] == "float64"
+        assert "encoding" in d["data"][0]
+        assert d["data"][2] == {"dtype": "object", "values": ["a", None, "c"]}
+
+        obj = json.loads(encoded, cls=MontyDecoder)
+        pd.testing.assert_frame_equal(obj.df, df)
+
+        # Unused categories and their order are kept, also in indexes
+        ordered = pd.Categorical(
+            ["low", None, "high"], categories=["low", "mid", "high"], ordered=True
+        )
+        df = pd.DataFrame(
+            {"level": ordered, "n": pd.Categorical([3, 1, 3], categories=[3, 2, 1])},
+            index=pd.CategoricalIndex(["a", "b", "a"], categories=["b", "a", "z"]),
+        )
+        encoded = json.dumps(df, cls=MontyEncoder, dataframe_encoding="columnar")
+        pd.testing.assert_frame_equal(json.loads(encoded, cls=MontyDecoder), df)
+
+        # Duplicate column names, RangeIndex and Series
+        df = pd.DataFrame([[1, 2.0], [3, 4.0]], columns=["a", "a"])
+        series = pd.Series([1.0, 2.0], index=pd.RangeIndex(2, 6, 2), name=("x", 1))
+        encoded = json.dumps(
+            [df, series], cls=MontyEncoder, dataframe_encoding="columnar"
+        )
+        assert json.loads(encoded)[1]["index"] == {
+            "name": None,
+            "start": 2,
+            "stop": 6,
+            "step": 2,
+        }
+        df2, series2 = json.loads(encoded, cls=MontyDecoder)
+        pd.testing.assert_frame_equal(df2, df)
+        pd.testing.assert_series_equal(series2, series)
+
+        # MultiIndex is stored with to_json
+        multi = pd.DataFrame(
+            {"a": [1, 2]}, index=pd.MultiIndex.from_tuples([(1, 3), (2, 4)])
+        )
+        encoded = json.dumps(multi, cls=MontyEncoder, dataframe_encoding="columnar")
+        assert "encoding" not in json.loads(encoded)
+
+        with pytest.raises(ValueError, match="Invalid dataframe_encoding"):
+            json.dumps(df, cls=MontyEncoder, dataframe_encoding="parquet")
+
     @pytest.mark.skipif(pint is None, reason="pint not present")
     def test_pint_quantity(self):
         ureg = pint.UnitRegistry()
@@ -772,6 +1159,83 @@ class TestJson:
         assert obj.qty.magnitude == 9.81
         assert str(obj.qty.units) == "meter / second ** 2"
 
+        # Inverse units are written without a numerator by pint
+        for qty in (pint.Quantity(1.0, "1/s"), pint.Quantity(1, "1/m**2")):
+            encoded = json.dumps(qty, cls=MontyEncoder)
+            assert json.loads(encoded, cls=MontyDecoder) == qty
+
+        # Decoded quantities share pint's application registry by default
+        qties = json.loads(
+            json.dumps([pint.Quantity(i, "eV") for i in range(100)], cls=MontyEncoder),
+            cls=MontyDecoder,
+        )
+        assert sum(qties, pint.Quantity(0, "eV")) == pint.Quantity(4950, "eV")
+        assert qties[0]._REGISTRY is qties[1]._REGISTRY
+
+        set_unit_registry(ureg)
+        try:
+            assert MontyDecoder().process_decoded(d["qty"])._REGISTRY is ureg
+        finally:
+            set_unit_registry(None)
+        assert MontyDecoder().process_decoded(d["qty"])._REGISTRY is not ureg
+
+    @pytest.mark.skipif(orjson is None, reason="orjson not present")
+    def test_orjson_engine(self):
+        obj = {
+            "mson": GoodMSONClass(1, [2.5, None], "c", hello={"x": True}),
+            "array": np.arange(6, dtype="float64").reshape(2, 3),
+            "float32": np.array([0.1, 0.2], dtype="float32"),
+            "strided": np.arange(10)[::2],
+            "complex": np.array([1 + 2j]),
+            "scalar": np.int64(3),
+            "datetime": datetime.datetime(2020, 1, 2, 3, 4, 5, 6),
+            "point": Point(3, 4),
+            "path": pathlib.Path("/tmp"),
+            1: "non-str key",
+        }
+        s_std = json.dumps(obj, cls=MontyEncoder)
+        s_orjson = orjson_dumps(obj)
+        assert json.loads(s_orjson) == json.loads(s_std)
+
+        decoded = MontyDecoder().decode(s_orjson)
+        assert decoded["mson"].as_dict() == obj["mson"].as_dict()
+        for key in ("array", "float32", "strided", "complex"):
+            assert decoded[key].dtype == obj[key].dtype
+            assert np.array_equal(decoded[key], obj[key])
+        assert decoded["datetime"] == obj["datetime"]
+        assert decoded["point"] == obj["point"]
+        assert decoded["path"] == obj["path"]
+
+        d = json.loads(orjson_dumps(obj, array_encoding="base64"))
+        assert d["array"]["encoding"] == "base64"
+
+        # Enums and UUIDs in MSONables are tagged like with json.dumps, unless
+        # they are also ints or strs
+        uuid = UUID("12345678-1234-5678-1234-567812345678")
+        obj = {
+            "mson": ClassContainingEnum(EnumTest.a),
+            "plain": ClassContainingEnum([EnumNoAsDict.name_a, IntEnumTest.a]),
+            "uuid": ClassContainingEnum({"id": uuid}),
+            "tuple": collections.namedtuple("Pair", "x y")(1, 2),
+        }
+        s_orjson = orjson_dumps(obj)
+        assert json.loads(s_orjson) == json.loads(json.dumps(obj, cls=MontyEncoder))
+        decoded = MontyDecoder().decode(s_orjson)
+        assert decoded["mson"].e is EnumTest.a
+        assert decoded["plain"].e == [EnumNoAsDict.name_a, 1]
+        assert decoded["uuid"].e == {"id": uuid}
+        assert decoded["tuple"] == [1, 2]
+        # but are written as values elsewhere, as orjson does
+        assert orjson_dumps([EnumTest.a, uuid]) == f'[1,"{uuid}"]'.encode()
+
+        assert b"\n  " in orjson_dumps({"a": 1}, indent=2)
+        assert orjson_dumps({"b": 1, "a": 2}, sort_keys=True) == b'{"a":2,"b":1}'
+
+        mson = GoodMSONClass(1, 2, 3)
+        assert json.loads(mson.to_json(engine="orjson")) == json.loads(mson.to_json())
+        with pytest.raises(ValueError, match="Invalid engine"):
+            mson.to_json(engine="simplejson")
+
     def test_callable(self):
         instance = MethodSerializationClass(a=1)
         for function in [
@@ -1000,6 +1464,110 @@ class TestJson:
             "Unserializable object should be converted to string in non-strict mode"
         )
 
+    def test_jsanitize_numpy_fast_paths(self):
+        d = {
+            "float": np.linspace(0, 1, 6).reshape(2, 3),
+            "int": np.arange(3, dtype="uint8"),
+            "bool": np.array([True, False]),
+            "scalar": np.array(2.5),
+            "complex": np.array([1 + 1j]),
+            "object": np.array([EnumNoAsDict.name_a, 1], dtype=object),
+            "list": [1, 2.0, "a", None, True, np.float32(0.5), (EnumNoAsDict.name_b,)],
+        }
+        clean = jsanitize(d, enum_values=True)
+        assert clean["float"] == [[0.0, 0.2, 0.4], [0.6000000000000001, 0.8, 1.0]]
+        assert all(type(x) is float for row in clean["float"] for x in row)
+        assert clean["int"] == [0, 1, 2]
+        assert all(type(x) is int for x in clean["int"])
+        assert clean["bool"] == [True, False]
+        assert clean["scalar"] == 2.5
+        assert clean["complex"] == ["(1+1j)"]
+        assert clean["object"] == ["value_a", 1]
+        assert clean["list"] == [1, 2.0, "a", None, True, 0.5, ["value_b"]]
+        assert type(clean["list"][5]) is float
+
+    def test_float_precision(self):
+        rng = np.random.default_rng(0)
+        values = rng.normal(scale=1e3, size=100)
+        d = {
+            "array": values,
+            "floats": values.tolist(),
+            "record": GoodMSONClass(1 / 3, [2 / 3], 3),
+            "special": [float("inf"), -float("inf"), 1.0, 0.0],
+        }
+        s = json.dumps(d, cls=MontyEncoder, float_precision=4)
+        assert len(s) < len(json.dumps(d, cls=MontyEncoder)) / 2
+        d2 = json.loads(s, cls=MontyDecoder)
+        bound = 0.5e-3 * np.abs(values)
+        assert np.all(np.abs(d2["array"] - values) <= bound)
+        assert np.all(np.abs(np.array(d2["floats"]) - values) <= bound)
+        assert d2["record"].a == 0.3333
+        assert d2["record"].b == [0.6667]
+        assert d2["special"] == d["special"]
+        assert type(d2["special"][2]) is float
+
+        # Same output when written incrementally or with indentation
+        assert json.dumps(
+            d, cls=MontyEncoder, float_precision=4, indent=2
+        ) == json.dumps(json.loads(s), indent=2)
+
+        with pytest.raises(ValueError, match="not JSON compliant"):
+            json.dumps(
+                [float("nan")], cls=MontyEncoder, float_precision=4, allow_nan=False
+            )
+        with pytest.raises(ValueError, match="Invalid float_precision"):
+            MontyEncoder(float_precision=0)
+
+        clean = jsanitize(
+            {"a": values[:3], "b": [1 / 3, {"c": 2 / 3}]}, float_precision=3
+        )
+        assert clean["a"] == [float(f"{v:.3g}") for v in values[:3]]
+        assert clean["b"] == [0.333, {"c": 0.667}]
+
+    @pytest.mark.parametrize("array_encoding", ["list", "base64", "base64-zlib"])
+    def test_float32_arrays(self, array_encoding):
+        values = np.linspace(0, 1, 101) ** 2
+        d = {"real": values, "complex": values * (1 + 2j), "int": np.arange(3)}
+        s = json.dumps(
+            d, cls=MontyEncoder, float32_arrays=True, array_encoding=array_encoding
+        )
+        assert len(s) < len(
+            json.dumps(d, cls=MontyEncoder, array_encoding=array_encoding)
+        )
+        d2 = json.loads(s, cls=MontyDecoder)
+        assert d2["real"].dtype == np.float32
+        assert d2["complex"].dtype == np.complex64
+        assert d2["int"].dtype == d["int"].dtype
+        assert np.array_equal(d2["real"], values.astype(np.float32))
+        assert np.array_equal(d2["complex"], d["complex"].astype(np.complex64))
+        assert np.all(np.abs(d2["real"] - values) <= 2**-24 * values)
+
+    @pytest.mark.parametrize("array_encoding", ["list", "base64-zlib"])
+    def test_delta_int_arrays(self, array_encoding):
+        arrays = [
+            np.arange(1000, dtype="int32").reshape(10, 100),
+            np.cumsum(np.arange(500, dtype="uint64")),
+            np.arange(0, -3000, -3),
+            np.array([2**63 - 1, 0, -(2**63)]),
+            np.array([3, 1, 2], dtype="int8"),
+            np.array([7]),
+        ]
+        s = json.dumps(
+            arrays,
+            cls=MontyEncoder,
+            delta_int_arrays=True,
+            array_encoding=array_encoding,
+        )
+        encodings = [a.get("encoding", "list") for a in json.loads(s)]
+        if array_encoding == "list":
+            assert encodings == ["delta-varint"] * 3 + ["list"] * 3
+        else:
+            assert encodings == ["delta-varint-zlib"] * 3 + ["base64-zlib"] * 3
+        assert len(s) < len(json.dumps(arrays, cls=MontyEncoder)) / 3
+        for array, decoded in zip(arrays, json.loads(s, cls=MontyDecoder)):
+            assert decoded.dtype == array.dtype
+            assert np.array_equal(decoded, array)
+
     @pytest.mark.skipif(pd is None, reason="pandas not present")
     def test_jsanitize_pandas(self):
         s = pd.Series({"a": [1, 2, 3], "b": [4, 5, 6]})
@@ -1049,6 +1617,266 @@ class TestJson:
             # AnotherClass from tests.test_json instead of tests.test_json2
             json.loads(json.dumps(d2), cls=MontyDecoder)
 
+    def test_process_decoded_containers(self):
+        decoder = MontyDecoder()
+        plain = {"a": [1, 2, {"b": "c"}], "d": {"e": [[]]}}
+        assert decoder.process_decoded(plain) is plain
+
+        obj = GoodMSONClass(1, 2, 3)
+        d = {
+            "plain": plain,
+            "list": [0, {"x": [obj.as_dict()]}, "s"],
+            1: "int key",
+        }
+        decoded = decoder.process_decoded(d)
+        assert decoded is not d
+        assert decoded["plain"] is plain
+        assert list(decoded) == ["plain", "list", 1]
+        assert decoded["list"][0] == 0
+        assert decoded["list"][2] == "s"
+        assert isinstance(decoded["list"][1]["x"][0], GoodMSONClass)
+        # The input is left untouched
+        assert isinstance(d["list"][1]["x"][0], dict)
+
+        # Unresolvable tagged dicts are treated as plain dicts
+        d = {"@module": "tests.test_json", "@class": "Missing", "x": [obj.as_dict()]}
+        decoded = decoder.process_decoded(d)
+        assert decoded["@class"] == "Missing"
+        assert isinstance(decoded["x"][0], GoodMSONClass)
+
+        # Deeply nested documents do not hit the recursion limit
+        depth = 10 * sys.getrecursionlimit()
+        deep = leaf = []
+        for _ in range(depth):
+            leaf.append({"x": []})
+            leaf = leaf[-1]["x"]
+        leaf.append(obj.as_dict())
+        decoded = decoder.process_decoded(deep)
+        for _ in range(depth):
+            decoded = decoded[-1]["x"]
+        assert isinstance(decoded[0], GoodMSONClass)
+
+    def test_class_cache(self):
+        clear_class_cache()
+        assert class_cache_info() == (0, 0, 0)
+
+        obj = GoodMSONClass(1, 2, 3)
+        s = json.dumps([obj, obj, obj], cls=MontyEncoder)
+        decoded = json.loads(s, cls=MontyDecoder)
+        assert all(isinstance(o, GoodMSONClass) for o in decoded)
+        info = class_cache_info()
+        assert info.misses == 1
+        assert info.hits == 2
+        assert info.currsize == 1
+
+        # Unknown classes are cached as misses and decode to plain dicts
+        d = {"@module": "tests.test_json", "@class": "NotAClass", "a": 1}
+        assert MontyDecoder().process_decoded(d) == d
+        assert MontyDecoder().process_decoded(d) == d
+        assert class_cache_info().currsize == 2
+
+        clear_class_cache()
+        assert class_cache_info() == (0, 0, 0)
+
+    def test_lazy_decoder(self):
+        obj = GoodMSONClass(1, 2, 3)
+        s = json.dumps({"objs": [obj, {"x": obj}], "n": 1}, cls=MontyEncoder)
+        decoded = json.loads(s, cls=MontyDecoder, lazy=True)
+        assert isinstance(decoded, LazyDecodedDict)
+        assert decoded["n"] == 1
+        assert isinstance(decoded.to_raw()["objs"], list)
+
+        objs = decoded["objs"]
+        assert isinstance(objs, LazyDecodedList)
+        assert isinstance(objs[0], GoodMSONClass)
+        assert objs[0] is objs[0]
+        assert isinstance(objs[1], LazyDecodedDict)
+        assert objs[1]["x"].as_dict() == obj.as_dict()
+        assert objs[:1] == [objs[0]]
+        assert len(objs) == 2
+
+        objs.append("y")
+        del decoded["n"]
+        d = json.loads(json.dumps(obj, cls=MontyEncoder))
+        assert json.loads(json.dumps(decoded, cls=MontyEncoder)) == {
+            "objs": [d, {"x": d}, "y"]
+        }
+        assert jsanitize(decoded, strict=True) == {"objs": [d, {"x": d}, "y"]}
+
+        # An MSONable at the root is decoded eagerly
+        s = json.dumps(obj, cls=MontyEncoder)
+        assert isinstance(json.loads(s, cls=MontyDecoder, lazy=True), GoodMSONClass)
+
+    def test_dedup(self):
+        arr = np.arange(100.0)
+        leaf = GoodMSONClass(arr, "b", 1)
+        obj = GoodMSONClass(leaf, [leaf, arr], {"leaf": leaf})
+        objs = [obj, obj, leaf]
+
+        s = json.dumps(objs, cls=MontyEncoder, dedup=True)
+        assert len(s) < len(json.dumps(objs, cls=MontyEncoder)) / 3
+        d = json.loads(s)
+        assert d[0]["@id"] == 0
+        assert d[1] == {"@ref": 0}
+        assert d[2] == {"@ref": 1}
+
+        decoded = json.loads(s, cls=MontyDecoder)
+        assert decoded[0] is decoded[1]
+        leaf2 = decoded[0].a
+        assert isinstance(leaf2, GoodMSONClass)
+        assert decoded[2] is leaf2
+        assert decoded[0].b[0] is leaf2
+        assert decoded[0]._c["leaf"] is leaf2
+        assert leaf2.a is decoded[0].b[1]
+        assert np.array_equal(leaf2.a, arr)
+
+        # Lazy containers resolve references in any order of access
+        decoded = json.loads(s, cls=MontyDecoder, lazy=True)
+        assert decoded[0] is decoded[1]
+        assert decoded[2] is decoded[0].a
+        decoded = json.loads(s, cls=MontyDecoder, lazy=True)
+        assert decoded[2] is decoded[1].a
+        assert decoded[0] is decoded[1]
+
+        # Overrides of as_dict are given the nested objects as dicts
+        s = json.dumps(
+            [PostProcessedMSONClass(leaf), leaf], cls=MontyEncoder, dedup=True
+        )
+        assert "@version" not in json.loads(s)[0]["child"]
+        decoded = json.loads(s, cls=MontyDecoder)
+        assert isinstance(decoded[0].child, GoodMSONClass)
+        assert isinstance(decoded[1], GoodMSONClass)
+
+        # as_dict is unaffected while an encoding is suspended
+        chunks = MontyEncoder(dedup=True).iterencode([obj, 1])
+        next(chunks)
+        assert isinstance(obj.as_dict()["a"], dict)
+        assert "".join(chunks)
+
+        # Each call to encode starts afresh
+        encoder = MontyEncoder(dedup=True)
+        assert encoder.encode(leaf) == encoder.encode(leaf)
+
+        if orjson is not None:
+            decoded = json.loads(orjson_dumps(objs, dedup=True), cls=MontyDecoder)
+            assert decoded[0] is decoded[1]
+            assert decoded[2] is decoded[0].a
+
+        # Cycles between MSONables can be encoded but not decoded
+        cyclic = GoodMSONClass(1, [], 3)
+        cyclic.b.append(cyclic)
+        s = json.dumps(cyclic, cls=MontyEncoder, dedup=True)
+        assert json.loads(s)["b"] == [{"@ref": 0}]
+        with pytest.raises(MSONError, match="cycle"):
+            json.loads(s, cls=MontyDecoder)
+        cyclic_list: list = []
+        cyclic_list.append(cyclic_list)
+        with pytest.raises(ValueError, match="Circular reference detected"):
+            json.dumps(cyclic_list, cls=MontyEncoder, dedup=True)
+
+        # References without a matching @id are plain data
+        for data in (
+            [{"@ref": 3}],
+            {"data": {"@ref": "abc"}},
+            {"@ref": [1]},
+            {"@ref": True},
+        ):
+            assert MontyDecoder().process_decoded(data) == data
+            assert MontyDecoder(lazy=True).process_decoded(data) == data
+
+    def test_decoder_parser(self):
+        obj = {"mson": GoodMSONClass(1, 2, 3), "price": "$5", "x": [1.5, None]}
+        s = json.dumps(obj, cls=MontyEncoder)
+        parsers = ["auto", "json"]
+        if json_util is not None:
+            parsers.append("bson")
+        if orjson is not None:
+            parsers.append("orjson")
+        for parser in parsers:
+            decoded = MontyDecoder(parser=parser).decode(s)
+            assert isinstance(decoded["mson"], GoodMSONClass)
+            assert decoded["price"] == "$5"
+            assert decoded["x"] == [1.5, None]
+
+        # Extended json is only decoded by bson's json_util
+        ext = '{"oid": {"$oid": "5f9f1b9b9c9d440000000000"}}'
+        assert MontyDecoder(parser="json").decode(ext) == {
+            "oid": {"$oid": "5f9f1b9b9c9d440000000000"}
+        }
+        if json_util is not None:
+            assert isinstance(MontyDecoder().decode(ext)["oid"], ObjectId)
+
+        with pytest.raises(ValueError, match="Invalid parser"):
+            MontyDecoder(parser="ujson")
+
+    def test_decoder_intern_strings(self):
+        undecodable = {"@module": "tests.test_json", "@class": "Missing", "v": 1}
+        obj = {
+            "records": [GoodMSONClass("species", ["Fe", "x" * 100], 3)] * 2,
+            "other": [undecodable, {"nested": [undecodable]}],
+        }
+        lines = [json.dumps(obj, cls=MontyEncoder)] * 2
+        decoder = MontyDecoder(intern_strings=True, drop_metadata=True)
+        first, second = (decoder.decode(line) for line in lines)
+        assert decoder.bytes_saved > 0
+        a, b = first["records"][0], second["records"][1]
+        assert a.a == b.a == "species"
+        assert a.a is b.a
+        assert a.b[0] is b.b[0]
+        # Long strings are not interned
+        assert a.b[1] == b.b[1]
+        assert a.b[1] is not b.b[1]
+        assert first["other"] == [{"v": 1}, {"nested": [{"v": 1}]}]
+        assert next(iter(first["other"][0])) is next(iter(second["other"][0]))
+
+        assert MontyDecoder().decode(lines[0])["other"][0] == undecodable
+
+        # Only tagged dicts lose their metadata, and the input is not modified
+        data = {"meta": {"@version": "1.2"}, "other": [undecodable]}
+        decoded = decoder.process_decoded(data)
+        assert decoded == {"meta": {"@version": "1.2"}, "other": [{"v": 1}]}
+        assert decoded["meta"] is data["meta"]
+        assert data["other"][0] == undecodable
+        with pytest.raises(ValueError, match="lazy"):
+            MontyDecoder(lazy=True, drop_metadata=True)
+
+    def test_register_encoder_decoder(self):
+        class Vec:
+            def __init__(self, x, y):
+                self.x, self.y = x, y
+
+        class SubVec(Vec):
+            pass
+
+        qualname = f"{Vec.__module__}.{Vec.__qualname__}"
+        try:
+            register_encoder(
+                Vec,
+                lambda enc, o: {"@module": "vec", "@class": "Vec", "xy": [o.x, o.y]},
+            )
+            register_decoder("vec", "Vec", lambda dec, d: Vec(*d["xy"]))
+
+            # Subclasses dispatch to the closest registered class in their MRO
+            s = json.dumps([Vec(1, 2), SubVec(3, 4)], cls=MontyEncoder)
+            assert json.loads(s)[1] == {
+                "@module": "vec",
+                "@class": "Vec",
+                "xy": [3, 4],
+            }
+            decoded = json.loads(s, cls=MontyDecoder)
+            assert [(v.x, v.y) for v in decoded] == [(1, 2), (3, 4)]
+
+            # Registering by qualified name replaces the encoder
+            register_encoder(qualname, lambda enc, o: [o.x, o.y])
+            assert json.loads(json.dumps(SubVec(5, 6), cls=MontyEncoder)) == [5, 6]
+        finally:
+            _ENCODERS.pop(qualname, None)
+            _ENCODER_DISPATCH.clear()
+            _DECODERS.pop(("vec", "Vec"), None)
+
+        with pytest.raises(TypeError):
+            json.dumps(Vec(1, 2), cls=MontyEncoder)
+
     def test_redirect_settings_file(self):
         data = _load_redirect(os.path.join(TEST_DIR, "settings_for_test.yaml"))
         assert data == {
@@ -1194,6 +2022,22 @@ class TestJson:
         str_ = json.dumps(ndc, cls=MontyEncoder)
         ndc2 = json.loads(str_, cls=MontyDecoder)
         assert isinstance(ndc2, NestedDataClass)
+        assert ndc2.points == ndc.points
+
+        # Fields are not copied and nested objects keep their tags
+        values = np.arange(4.0)
+        dc = DataClassWithArray(values, Point(1, 2), GoodMSONClass(1, 2, 3))
+        d = MontyEncoder().default(dc)
+        assert d["values"] is values
+        assert d["point"] is dc.point
+        d = Coordinates([dc]).as_dict()
+        assert d["points"][0]["values"] is values
+        assert d["points"][0]["point"]["@class"] == "Point"
+        assert d["points"][0]["record"]["@class"] == "GoodMSONClass"
+        dc2 = json.loads(json.dumps(dc, cls=MontyEncoder), cls=MontyDecoder)
+        assert np.array_equal(dc2.values, values)
+        assert dc2.point == dc.point
+        assert isinstance(dc2.record, GoodMSONClass)
 
     def test_enum(self):
         s = MontyEncoder().encode(EnumNoAsDict.name_a)
@@ -1268,6 +2112,23 @@ class TestCheckType:
         assert _check_type(b, class_name_A)
         assert isinstance(b, A)
 
+    def test_mro_names_cache(self):
+        class A:
+            pass
+
+        class B(A):
+            pass
+
+        names = _get_mro_names(B)
+        assert names is _get_mro_names(B)
+        assert names == {
+            f"{B.__module__}.{B.__qualname__}",
+            f"{A.__module__}.{A.__qualname__}",
+            "builtins.object",
+        }
+        assert _check_type(B(), (f"{A.__module__}.{A.__qualname__}", "foo.Bar"))
+        assert not _check_type(B(), ("foo.Bar", "foo.Baz"))
+
     def test_check_class(self):
         """This should not work for classes."""
 
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
 import glob
+import itertools
 import json
 import os
+import subprocess
+import sys
+import time
 
+import numpy as np
 import pytest
 
-from monty.serialization import dumpfn, loadfn
+import monty.json
+from monty.io import zopen
+from monty.json import LazyDecodedDict, LazyDecodedList, MontyEncoder, MSONable
+from monty.serialization import dumpfn, iterloadfn, loadfn
 from monty.tempfile import ScratchDir
 
 try:
@@ -14,6 +22,17 @@ try:
 except ImportError:
     msgpack = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class Record(MSONable):
+    def __init__(self, name, values):
+        self.name = name
+        self.values = values
+
 
 class TestSerial:
     @classmethod
@@ -84,3 +103,213 @@ class TestSerial:
             with open("test_file.json", encoding="utf-8") as f:
                 reloaded = json.loads(f.read())
             assert reloaded["test"] == 1
+
+    @pytest.mark.skipif(orjson is None, reason="orjson not present")
+    def test_orjson_engine(self, tmp_path):
+        d = {"records": [Record("a", np.arange(3)), Record("b", [1.5])]}
+        for ext in ("json", "json.gz"):
+            fn = tmp_path / f"monte_test.{ext}"
+            dumpfn(d, fn, engine="orjson", indent=2)
+            for engine in ("json", "orjson"):
+                d2 = loadfn(fn, engine=engine)
+                assert isinstance(d2["records"][0], Record)
+                assert np.array_equal(d2["records"][0].values, np.arange(3))
+                assert d2["records"][1].values == [1.5]
+
+        with pytest.raises(ValueError, match="Invalid engine"):
+            dumpfn(d, tmp_path / "monte_test.json", engine="ujson")
+        with pytest.raises(ValueError, match="Invalid engine"):
+            loadfn(tmp_path / "monte_test.json", engine="ujson")
+
+    @pytest.mark.parametrize(
+        "kwargs", [{}, {"sort_keys": True}, {"separators": (",", ":")}]
+    )
+    def test_dumpfn_incremental(self, tmp_path, monkeypatch, kwargs):
+        # Encode most containers item by item
+        monkeypatch.setattr(monty.json, "_CHUNK_NODE_LIMIT", 2)
+        doc = {
+            "records": [Record(str(i), list(range(i))) for i in range(5)],
+            "array": np.arange(6).reshape(2, 3),
+            "keys": {2: "a", 1.5: [1, 2, 3], True: None, -1: ["x"] * 3},
+            "nested": [[{"z": 1, "y": [2, 3, 4]}] * 3, (1, "b", None)],
+        }
+        fn = tmp_path / "monte_test.json"
+        dumpfn(doc, fn, **kwargs)
+        with open(fn, encoding="utf-8") as file:
+            assert file.read() == json.dumps(doc, cls=MontyEncoder, **kwargs)
+
+        doc["nested"].append(doc)
+        with pytest.raises(ValueError, match="Circular reference"):
+            dumpfn(doc, fn)
+
+    def test_loadfn_lazy(self, tmp_path):
+        doc = {
+            "records": [Record("a", [1, 2]), Record("b", [3])],
+            "meta": {"n": 2, "nested": {"record": Record("c", [])}},
+        }
+        for ext in ("json", "json.gz", "mpk"):
+            fn = tmp_path / f"monte_test.{ext}"
+            dumpfn(doc, fn)
+            loaded = loadfn(fn, lazy=True)
+            assert isinstance(loaded, LazyDecodedDict)
+            records = loaded["records"]
+            assert isinstance(records, LazyDecodedList)
+            assert isinstance(records.to_raw()[1], dict)
+            assert records[1].name == "b"
+            assert records[1] is records[1]
+            assert isinstance(records.to_raw()[0], dict)
+            assert loaded["meta"]["n"] == 2
+            assert loaded["meta"]["nested"]["record"].name == "c"
+
+            # Partially decoded documents can be written back
+            loaded["meta"]["n"] = 3
+            dumpfn(loaded, fn)
+            reloaded = loadfn(fn)
+            assert [r.name for r in reloaded["records"]] == ["a", "b"]
+            assert reloaded["meta"]["n"] == 3
+
+        with pytest.raises(ValueError, match="Lazy loading"):
+            loadfn(tmp_path / "monte_test.yaml", lazy=True)
+
+    def test_loadfn_select(self, tmp_path):
+        doc = {
+            "input": {"text": 'quote " ] }', "values": list(range(100))},
+            "output": {"energy": -1.5, "records": [Record("a", np.arange(3))]},
+            "list": [[0, 1], {"x": None}],
+        }
+        exts = ["json", "json.gz"] + (["mpk"] if msgpack is not None else [])
+        for ext in exts:
+            fn = tmp_path / f"monte_test.{ext}"
+            dumpfn(doc, fn)
+            assert loadfn(fn, select="output.energy") == -1.5
+            record = loadfn(fn, select="output.records.0")
+            assert isinstance(record, Record)
+            assert np.array_equal(record.values, np.arange(3))
+            assert loadfn(fn, select=["list", "1", "x"]) is None
+            assert loadfn(fn, select="input")["text"] == doc["input"]["text"]
+            lazy = loadfn(fn, select="output", lazy=True)
+            assert isinstance(lazy, LazyDecodedDict)
+            assert lazy["records"][0].name == "a"
+
+            with pytest.raises(KeyError):
+                loadfn(fn, select="output.missing")
+            with pytest.raises(IndexError):
+                loadfn(fn, select="list.2")
+            with pytest.raises(KeyError):
+                loadfn(fn, select="output.energy.value")
+
+        with pytest.raises(ValueError, match="not supported for yaml"):
+            loadfn(tmp_path / "monte_test.yaml", select="a")
+
+        # Skipping is linear in the size of the values skipped, including
+        # long flat lists of strings spanning several chunks
+        doc = {"strings": [f"s{i}" for i in range(50000)], "output": {"runs": [1]}}
+        fn = tmp_path / "monte_test.json"
+        dumpfn(doc, fn)
+        start = time.perf_counter()
+        assert loadfn(fn, select="output.runs.0") == 1
+        assert list(iterloadfn(fn, prefix="output.runs")) == [1]
+        assert time.perf_counter() - start < 2
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 2**16])
+    def test_iterloadfn(self, tmp_path, chunk_size):
+        records = [
+            Record("a", np.arange(3)),
+            {"text": 'quote " and \\ backslash ] }', "nested": [[1, [2]], {}]},
+            Record("b\u00e9", [1.5, None, True, float("inf")]),
+            [],
+            "plain",
+            -1.25e-3,
+        ]
+        for ext in ("json", "json.gz"):
+            fn = tmp_path / f"monte_test.{ext}"
+            dumpfn(records, fn, indent=1)
+            loaded = list(iterloadfn(fn, chunk_size=chunk_size))
+            assert len(loaded) == len(records)
+            assert isinstance(loaded[0], Record)
+            assert np.array_equal(loaded[0].values, np.arange(3))
+            assert loaded[1] == records[1]
+            assert loaded[2].name == "b\u00e9"
+            assert loaded[2].values == [1.5, None, True, float("inf")]
+            assert loaded[3:] == records[3:]
+
+        doc = {
+            "skipped": {"a": [1, 2, {"]": "["}], "b": "x\\"},
+            "data": {"runs": [{"steps": [0]}, {"steps": records[:2]}]},
+            "empty": [],
+        }
+        fn = tmp_path / "monte_test.json"
+        dumpfn(doc, fn)
+        loaded = list(iterloadfn(fn, prefix="data.runs.1.steps", chunk_size=chunk_size))
+        assert loaded[0].name == "a"
+        assert loaded[1] == records[1]
+        loaded = list(iterloadfn(fn, prefix=["data", "runs"], chunk_size=chunk_size))
+        assert loaded[0] == {"steps": [0]}
+        assert list(iterloadfn(fn, prefix="empty", chunk_size=chunk_size)) == []
+
+        with pytest.raises(KeyError):
+            list(iterloadfn(fn, prefix="data.missing"))
+        with pytest.raises(IndexError):
+            list(iterloadfn(fn, prefix="data.runs.2"))
+        with pytest.raises(ValueError):
+            list(iterloadfn(fn, prefix="data"))
+
+    @pytest.mark.parametrize("processes", [None, 2])
+    def test_jsonl(self, tmp_path, processes):
+        records = [Record(str(i), np.arange(i)) for i in range(20)]
+        records += [{"plain": [1, None]}, "text", 2.5]
+        engines = ["json", "orjson"] if orjson is not None else ["json"]
+        for ext, engine in itertools.product(("jsonl", "jsonl.gz"), engines):
+            fn = tmp_path / f"monte_test.{ext}"
+            dumpfn(iter(records), fn, engine=engine)
+            with zopen(fn, mode="rt", encoding="utf-8") as file:
+                assert len(file.readlines()) == len(records)
+
+            loaded = list(
+                iterloadfn(fn, chunk_size=50, engine=engine, processes=processes)
+            )
+            assert [r.name for r in loaded[:20]] == [str(i) for i in range(20)]
+            assert np.array_equal(loaded[19].values, np.arange(19))
+            assert loaded[20:] == records[20:]
+
+            loaded = loadfn(fn, engine=engine, processes=processes)
+            assert isinstance(loaded[0], Record)
+            assert loaded[20:] == records[20:]
+
+        # Blank lines are skipped
+        fn = tmp_path / "monte_test.jsonl"
+        with open(fn, "a", encoding="utf-8") as file:
+            file.write("\n")
+        assert len(loadfn(fn)) == len(records)
+
+        with pytest.raises(ValueError, match="indent"):
+            dumpfn(records, fn, indent=2)
+        with pytest.raises(ValueError, match="prefix"):
+            list(iterloadfn(fn, prefix="a"))
+        if processes is not None:
+            with pytest.raises(ValueError, match="lazy"):
+                loadfn(fn, lazy=True, processes=processes)
+
+    def test_import_time(self):
+        # Optional dependencies must not be imported with monty.serialization
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import monty.serialization"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        imported = {
+            line.split("|")[-1].strip()
+            for line in proc.stderr.splitlines()
+            if line.startswith("import time:")
+        }
+        assert "monty.serialization" in imported
+        for name in ("numpy", "ruamel.yaml", "bson", "msgpack", "importlib.metadata"):
+            assert name not in imported
+
+        # The names previously imported are still available
+        assert monty.json.np is np
+        assert monty.serialization.msgpack is msgpack
+        assert monty.serialization.YAML().load("a: 1") == {"a": 1}
+        with pytest.raises(AttributeError):
+            monty.json.numpy  # noqa: B018